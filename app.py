@@ -1,26 +1,25 @@
 # app.py
-import os
-from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtGui import QIcon, QShortcut, QKeySequence
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
-import os, sys
+import socket
+import weakref
+from PyQt6 import sip
+from PyQt6.QtWidgets import QApplication, QMessageBox, QDialog, QVBoxLayout
+from PyQt6.QtGui import QIcon, QAction, QKeySequence, QCursor
+from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer, QObject, QRunnable, QThreadPool
 
 # --- IMPORT CÁC MODULE GIAO DIỆN (VIEW) ---
 from frontend.main_window import MainWindow        # Khung cửa sổ chính (Container)
 from frontend.home_page import HomePage            # Trang chủ (View)
-from frontend.login_page import LoginPage
-from frontend.write_review_page import WriteReviewPage
-from frontend.settings_page import SettingsPage
-from frontend.info_page import InfoPage
-from frontend.result_page import SearchResultsPage # Trang kết quả (Dynamic)
-from frontend.respond_window import RespondWindow   # Popup window for extension
 from frontend.UI_helpers import get_asset_path     # Asset path for PyInstaller compatibility
+# Các trang còn lại (Login, Write Review, Settings, Info, Result) được import
+# ngay trong hàm sử dụng chúng để cửa sổ chính hiện lên nhanh hơn khi khởi động
 
 # --- IMPORT MODULE HỆ THỐNG & BACKEND ---
 from frontend.system_tray_utils import SystemTrayManager
 from frontend import configuration as cf
-from backend import user  # Module quản lý user
-from backend import localserver  # Local server for extension integration
+# backend.localserver (Flask) được import trong ServerWorker.run
+
+# Stylesheet dùng chung cho QMessageBox (chữ đen để dễ đọc), tạo 1 lần khi load module
+_MSG_STYLE = "QLabel{color: #000000;} QPushButton{color: #000000;}"
 
 # ============================================================
 # CLASS CHẠY SERVER DƯỚI DẠNG LUỒNG (THREAD)
@@ -30,6 +29,8 @@ class ServerWorker(QThread):
     new_url_signal = pyqtSignal(str)
     
     def run(self):
+        from backend import localserver  # Import Flask trên luồng server, không chặn GUI
+
         # Hàm cầu nối: Flask gọi hàm này -> Hàm này phát tín hiệu PyQt
         def bridge_callback(url):
             self.new_url_signal.emit(url)
@@ -44,7 +45,43 @@ class ServerWorker(QThread):
         except Exception as e:
             print(f"[ServerWorker] Server error: {e}")
 
+class ConnectivitySignals(QObject):
+    """Signal holder cho ConnectivityProbe (QRunnable không phải QObject)"""
+    finished = pyqtSignal(bool, str)  # ok, error_message
+
+
+class ConnectivityProbe(QRunnable):
+    """Kiểm tra kết nối Internet trên QThreadPool để không chặn luồng GUI"""
+
+    # TCP connect tới DNS công cộng: rẻ hơn nhiều so với HTTPS GET (không DNS, không TLS)
+    HOST = ('1.1.1.1', 53)
+
+    def __init__(self, signals):
+        super().__init__()
+        self.signals = signals
+
+    def run(self):
+        try:
+            with socket.create_connection(self.HOST, timeout=1):
+                pass
+            ok, err = True, ""
+        except Exception as e:
+            # Any failure (timeout, unreachable network...) counts as not connected
+            ok = False
+            err = str(e)
+        self.signals.finished.emit(ok, err)
+
+
 class AppManager(QApplication):
+    # Kích thước cửa sổ cố định cho từng trang tĩnh (theo tên thuộc tính)
+    PAGE_SIZES = {
+        'home_page': (750, 280),
+        'login_page': (500, 600),
+        'write_review_page': (600, 600),
+        'settings_page': (700, 500),
+        'info_page': (700, 500),
+    }
+
     def __init__(self, argv):
         super().__init__(argv)
 
@@ -52,33 +89,52 @@ class AppManager(QApplication):
         # 1. KHỞI TẠO CỬA SỔ CHÍNH & SYSTEM TRAY
         # ============================================================
         self.main_window = MainWindow()
+
+        # Cache tâm màn hình chính, chỉ cập nhật khi màn hình thay đổi (xem _center_window)
+        self._screen_center = None
+        self._watch_screen(self.primaryScreen())
+        self.primaryScreenChanged.connect(self._watch_screen)
         
         self.icon_path = get_asset_path('icon.png')  # PyInstaller compatible path
-        self.main_window.setWindowIcon(QIcon(self.icon_path))
+        self.app_icon = QIcon(self.icon_path)  # Tạo 1 lần, dùng lại cho mọi popup
+        self.main_window.setWindowIcon(self.app_icon)
         
         # Quản lý System Tray (Chạy ngầm)
         self.tray_manager = SystemTrayManager(
             main_window=self.main_window,
             app=self, 
             icon_path=self.icon_path, 
-            app_id="TrueWeb"
+            app_id="TrueWeb",
+            icon=self.app_icon  # Dùng lại icon đã decode, không đọc lại file PNG
         )
 
         # Ngăn app tự tắt khi đóng cửa sổ cuối cùng (popup)
         self.setQuitOnLastWindowClosed(False)
 
-        # Quản lý popup windows từ extension
-        self.active_popups = []
+        # Quản lý popup windows từ extension (weak refs: Qt tự xóa popup khi đóng)
+        self.active_popups = weakref.WeakSet()
+        self._latest_popup = None  # weakref tới popup mở gần nhất
+        # WriteReviewPage dùng chung cho popup + (dialog, results_page) đang chứa nó
+        self._ext_write_review_page = None
+        self._ext_review_target = None
+        # Nền popup khi hiện trang review, chỉ tính lại khi đổi theme
+        self._dialog_bg_style = self._make_dialog_bg_style()
+
+        # QMessageBox dùng lại theo từng loại icon (xem _show_message)
+        self._msg_cache = {}
 
         # ============================================================
         # 2. KHỞI TẠO CÁC TRANG (PAGES)
         # ============================================================
-        # Các trang tĩnh (Static) chỉ cần tạo 1 lần
+        # Trang Home tạo ngay; các trang tĩnh còn lại chỉ tạo ở lần mở đầu tiên
+        # (xem _ensure_page) để cửa sổ chính hiện lên nhanh hơn
         self.home_page = HomePage()
-        self.login_page = LoginPage("Login")
-        self.write_review_page = WriteReviewPage("Write Review")
-        self.settings_page = SettingsPage("Settings")
-        self.info_page = InfoPage("About Us")
+        # {id(widget): (w, h)} - tra cứu O(1) khi đổi trang (xem _apply_page_size)
+        self._page_sizes = {id(self.home_page): self.PAGE_SIZES['home_page']}
+        self.login_page = None
+        self.write_review_page = None
+        self.settings_page = None
+        self.info_page = None
         
         # Trang động (Dynamic) sẽ tạo sau khi search
         self.search_results_page_instance = None
@@ -89,13 +145,9 @@ class AppManager(QApplication):
         self._connect_signals()
 
         # ============================================================
-        # 3. ĐƯA CÁC TRANG VÀO STACK CỦA MAIN WINDOW
+        # 3. ĐƯA TRANG HOME VÀO STACK CỦA MAIN WINDOW
         # ============================================================
         self.main_window.add_page(self.home_page)         
-        self.main_window.add_page(self.login_page)        
-        self.main_window.add_page(self.write_review_page) 
-        self.main_window.add_page(self.settings_page)     
-        self.main_window.add_page(self.info_page)         
 
         # Set trang mặc định là Home
         self.main_window.set_page(self.home_page)
@@ -114,17 +166,20 @@ class AppManager(QApplication):
         # ============================================================
         # 6. KHỞI ĐỘNG LOCAL SERVER (EXTENSION INTEGRATION)
         # ============================================================
-        self.server_thread = ServerWorker()
-        self.server_thread.new_url_signal.connect(self.handle_incoming_link)
-        # Khi app chính tắt, luồng server cũng sẽ bị hủy theo
-        self.server_thread.start()
+        # Khởi động server sau khi event loop chạy để cửa sổ chính được vẽ trước
+        self.server_thread = None
+        QTimer.singleShot(0, self._start_server)
         
         # ============================================================
         # 7. GLOBAL KEYBOARD SHORTCUT (FOCUS ANALYZE WINDOW)
         # ============================================================
         # Ctrl+Shift+Space: Focus vào analyze window nếu đang mở
-        self.focus_shortcut = QShortcut(QKeySequence("Ctrl+Shift+Space"), self.main_window)
-        self.focus_shortcut.activated.connect(self.focus_analyze_window)
+        # ApplicationShortcut: hoạt động cả khi focus đang ở popup extension
+        self.focus_action = QAction(self)
+        self.focus_action.setShortcut(QKeySequence("Ctrl+Shift+Space"))
+        self.focus_action.setShortcutContext(Qt.ShortcutContext.ApplicationShortcut)
+        self.focus_action.triggered.connect(self.focus_analyze_window)
+        self.main_window.addAction(self.focus_action)
         
         # ============================================================
         # 8. CLEANUP ON APP EXIT
@@ -135,8 +190,15 @@ class AppManager(QApplication):
         # 9. REAL-TIME CONNECTIVITY CHECK (periodic)
         # ============================================================
         # Check internet connectivity periodically; on loss show dialog and exit.
+        # Kết nối ổn định -> kiểm tra mỗi 30s; thất bại -> thử lại sau 1s, 2s (backoff)
+        self._probe_inflight = False
+        self._connectivity_attempts = 0           # Số lần thất bại liên tiếp
+        self._connectivity_healthy_interval = 30000  # 30s khi kết nối ổn định
+        self._connectivity_max_failures = 3       # Báo mất kết nối sau 3 lần thất bại liên tiếp
+        self._connectivity_signals = ConnectivitySignals(self)
+        self._connectivity_signals.finished.connect(self._on_connectivity_result)
         self.connectivity_timer = QTimer(self)
-        self.connectivity_timer.setInterval(5000)  # check every 5 seconds
+        self.connectivity_timer.setInterval(self._connectivity_healthy_interval)
         self.connectivity_timer.timeout.connect(self._check_connectivity)
         self.connectivity_timer.start()
 
@@ -146,26 +208,65 @@ class AppManager(QApplication):
         # --- A. TÍN HIỆU TỪ HOME PAGE ---
         self.home_page.search_requested.connect(self.show_search_results_page)
         self.home_page.login_nav_requested.connect(self.handle_login_nav_request)
-        self.home_page.settings_nav_requested.connect(lambda: self.main_window.set_page(self.settings_page))
-        self.home_page.info_nav_requested.connect(lambda: self.main_window.set_page(self.info_page))
-
-        # --- B. TÍN HIỆU TỪ LOGIN PAGE ---
-        self.login_page.back_to_home_requested.connect(self.return_home)
-        self.login_page.login_success_signal.connect(self.on_user_logged_in)
-        self.login_page.logout_signal.connect(self.on_user_logged_out)
-
-        # --- C. TÍN HIỆU TỪ CÁC TRANG KHÁC ---
-        self.settings_page.back_to_home_requested.connect(self.return_home)
-        self.info_page.back_to_home_requested.connect(self.return_home)
-        
-        # --- D. TÍN HIỆU TỪ WRITE REVIEW PAGE ---
-        self.write_review_page.cancelled.connect(self.return_to_results_or_home)
-        self.write_review_page.review_submitted.connect(self.handle_new_review_submission)
-
-        # --- E. TÍN HIỆU HỆ THỐNG (RESIZE WINDOW & SETTINGS) ---
-        self.main_window.pages_stack.currentChanged.connect(self.handle_page_changed)
-        self.settings_page.minimize_to_tray_toggled.connect(self.tray_manager.set_minimize_to_tray)
-        self.settings_page.theme_toggled.connect(self.handle_theme_change)
+        self.home_page.settings_nav_requested.connect(self._go_settings)
+        self.home_page.info_nav_requested.connect(self._go_info)
+
+        # --- B. TÍN HIỆU HỆ THỐNG (RESIZE WINDOW) ---
+        self.main_window.currentWidgetChanged.connect(self._apply_page_size)
+        # Tín hiệu của Login / Write Review / Settings / Info được nối trong
+        # các hàm _create_*_page khi trang được tạo lần đầu
+
+    def _go_settings(self):
+        self.main_window.set_page(self._ensure_page('settings_page', self._create_settings_page))
+
+    def _go_info(self):
+        self.main_window.set_page(self._ensure_page('info_page', self._create_info_page))
+
+    def _ensure_page(self, attr, factory):
+        """Tạo trang ở lần dùng đầu tiên, thêm vào stack và trả về trang đó"""
+        page = getattr(self, attr)
+        if page is None:
+            page = factory()
+            setattr(self, attr, page)
+            self._page_sizes[id(page)] = self.PAGE_SIZES[attr]
+            self.main_window.add_page(page)
+        return page
+
+    def _create_login_page(self):
+        from frontend.login_page import LoginPage
+        page = LoginPage("Login")
+        page.back_to_home_requested.connect(self.return_home)
+        page.login_success_signal.connect(self.on_user_logged_in)
+        page.logout_signal.connect(self.on_user_logged_out)
+        return page
+
+    def _create_write_review_page(self):
+        from frontend.write_review_page import WriteReviewPage
+        page = WriteReviewPage("Write Review")
+        page.cancelled.connect(self.return_to_results_or_home)
+        page.review_submitted.connect(self.handle_new_review_submission)
+        return page
+
+    def _create_settings_page(self):
+        from frontend.settings_page import SettingsPage
+        page = SettingsPage("Settings")
+        page.back_to_home_requested.connect(self.return_home)
+        page.minimize_to_tray_toggled.connect(self.tray_manager.set_minimize_to_tray)
+        page.theme_toggled.connect(self.handle_theme_change)
+        return page
+
+    def _create_info_page(self):
+        from frontend.info_page import InfoPage
+        page = InfoPage("About Us")
+        page.back_to_home_requested.connect(self.return_home)
+        return page
+
+    def _start_server(self):
+        """Khởi chạy ServerWorker (Flask) cho extension"""
+        self.server_thread = ServerWorker()
+        self.server_thread.new_url_signal.connect(self.handle_incoming_link)
+        # Khi app chính tắt, luồng server cũng sẽ bị hủy theo
+        self.server_thread.start()
 
     # ============================================================
     # 6. CÁC HÀM XỬ LÝ LOGIC (CONTROLLER LOGIC)
@@ -174,12 +275,9 @@ class AppManager(QApplication):
     # --- LOGIC TÌM KIẾM & KẾT QUẢ ---
     def show_search_results_page(self, query, timeout=30, screenshot_enabled=True):
         # 0. EARLY CHECK: Verify website is reachable before showing result page
-        from PyQt6.QtWidgets import QMessageBox
         from backend.scoring_system import check_website_reachable
         
         # Show loading cursor while checking
-        from PyQt6.QtGui import QCursor
-        from PyQt6.QtCore import Qt
         self.main_window.setCursor(QCursor(Qt.CursorShape.WaitCursor))
         
         try:
@@ -189,13 +287,12 @@ class AppManager(QApplication):
                 # Website is unreachable - show error and stay on home page
                 self.main_window.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
                 
-                msg = QMessageBox(self.main_window)
-                msg.setIcon(QMessageBox.Icon.Critical)
-                msg.setWindowTitle("Website Unreachable")
-                msg.setText(f"Cannot connect to the website:\n\n{query}")
-                msg.setInformativeText(f"Reason: {error_message}\n\nPlease check:\n• The URL is correct\n• The website is online\n• Your internet connection")
-                msg.setStyleSheet("QLabel{color: #000000;} QPushButton{color: #000000;}")
-                msg.exec()
+                self._show_message(
+                    "Website Unreachable",
+                    f"Cannot connect to the website:\n\n{query}",
+                    QMessageBox.Icon.Critical,
+                    f"Reason: {error_message}\n\nPlease check:\n• The URL is correct\n• The website is online\n• Your internet connection"
+                )
                 return  # Stop here, don't proceed to result page
         finally:
             self.main_window.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
@@ -207,6 +304,7 @@ class AppManager(QApplication):
             self.search_results_page_instance = None
 
         # 2. Tạo trang kết quả mới với timeout và screenshot preference từ user
+        from frontend.result_page import SearchResultsPage
         self.search_results_page_instance = SearchResultsPage(query, timeout, screenshot_enabled)
 
         # 3. Kết nối tín hiệu riêng của trang kết quả
@@ -242,14 +340,15 @@ class AppManager(QApplication):
     # --- LOGIC ĐĂNG NHẬP / ĐĂNG XUẤT ---
     def handle_login_nav_request(self):
         """Xử lý khi bấm nút Login trên Menu"""
+        login_page = self._ensure_page('login_page', self._create_login_page)
         if self.is_logged_in:
             # Nếu đã login -> Trang login sẽ hiện popup hỏi Logout
-            self.login_page.handle_entry_request(True)
+            login_page.handle_entry_request(True)
         else:
             # Nếu chưa -> Trang login hiện form nhập liệu
-            self.login_page.handle_entry_request(False)
+            login_page.handle_entry_request(False)
         
-        self.main_window.set_page(self.login_page)
+        self.main_window.set_page(login_page)
 
     def on_user_logged_in(self):
         self.is_logged_in = True
@@ -272,7 +371,7 @@ class AppManager(QApplication):
             self._show_message("Login Required", "You need to log in to write a review!", QMessageBox.Icon.Warning)
             return
         
-        self.main_window.set_page(self.write_review_page)
+        self.main_window.set_page(self._ensure_page('write_review_page', self._create_write_review_page))
 
     def handle_new_review_submission(self, score, comment):
         """Xử lý khi người dùng bấm Confirm Review"""
@@ -284,26 +383,17 @@ class AppManager(QApplication):
         self.return_to_results_or_home()
 
     # --- LOGIC RESIZE CỬA SỔ (QUAN TRỌNG) ---
-    def handle_page_changed(self, index):
+    def _apply_page_size(self, widget):
         """
         Tự động thay đổi kích thước cửa sổ dựa trên trang đang hiển thị.
         Logic này trước đây nằm ở home_page, giờ App quản lý.
         """
-        widget = self.main_window.pages_stack.widget(index)
+        size = self._page_sizes.get(id(widget))
         
-        if widget == self.home_page:
-            self.main_window.setFixedSize(750, 280)
-            
-        elif widget == self.login_page:
-            self.main_window.setFixedSize(500, 600)
-            
-        elif widget == self.write_review_page:
-            self.main_window.setFixedSize(600, 600)
+        if size:
+            self.main_window.setFixedSize(*size)
             
-        elif widget == self.settings_page or widget == self.info_page:
-            self.main_window.setFixedSize(700, 500)
-            
-        elif isinstance(widget, SearchResultsPage):
+        elif widget is self.search_results_page_instance:
             if getattr(widget, 'has_finished_loading', False):
                  self.main_window.setFixedSize(900, 700)
             else:
@@ -312,61 +402,96 @@ class AppManager(QApplication):
                 self._center_window()
 
     # --- UTILS HELPER ---
-    def _center_window(self):
-        screen = self.main_window.screen()
+    def _watch_screen(self, screen):
+        """Theo dõi màn hình chính để cập nhật tâm màn hình khi đổi độ phân giải/taskbar"""
         if screen:
-            geom = screen.availableGeometry()
-            current_geo = self.main_window.frameGeometry()
-            current_geo.moveCenter(geom.center())
-            self.main_window.move(current_geo.topLeft())
+            screen.availableGeometryChanged.connect(self._refresh_screen_center)
+        self._refresh_screen_center()
+
+    def _refresh_screen_center(self, *_):
+        screen = self.primaryScreen()
+        self._screen_center = screen.availableGeometry().center() if screen else None
+
+    def _center_window(self, widget=None):
+        """Đưa cửa sổ (mặc định là main window) vào giữa màn hình, dùng tâm đã cache"""
+        widget = widget or self.main_window
+        if self._screen_center is None:
+            return
+        current_geo = widget.frameGeometry()
+        current_geo.moveCenter(self._screen_center)
+        widget.move(current_geo.topLeft())
 
-    def _show_message(self, title, text, icon):
+    def _make_dialog_bg_style(self):
+        return f"QDialog {{ background-color: {cf.APP_BACKGROUND}; }}"
+
+    def _make_msg(self, icon):
+        """Tạo QMessageBox đã style sẵn cho một loại icon"""
         msg = QMessageBox(self.main_window)
+        msg.setIcon(icon)
+        # Ensure dialog text/buttons are rendered in black for readability
+        msg.setStyleSheet(_MSG_STYLE)
+        return msg
+
+    def _show_message(self, title, text, icon, informative_text=""):
+        msg = self._msg_cache.get(icon)
+        if msg is None:
+            msg = self._msg_cache[icon] = self._make_msg(icon)
+        temporary = msg.isVisible()
+        if temporary:
+            # Box cùng icon đang mở (modal, vd. tín hiệu server/connectivity tới liên tiếp):
+            # không exec() lồng trên nó, dùng box mới để không ghi đè nội dung thông báo trước
+            msg = self._make_msg(icon)
         msg.setWindowTitle(title)
         msg.setText(text)
-        msg.setIcon(icon)
-        msg.setStyleSheet(f"QLabel{{color: #000000;}} QPushButton{{color: #000000;}}")
-        msg.exec()
+        msg.setInformativeText(informative_text)
+        try:
+            return msg.exec()
+        finally:
+            if temporary:
+                msg.deleteLater()
 
     def _check_connectivity(self):
-        """Periodic check: if internet unreachable, show dialog and exit app on OK."""
-        try:
-            from backend.scoring_system import quick_connectivity_check
-            # Use a simple well-known host for checking (no user URL)
-            ok, err = quick_connectivity_check('https://www.google.com', timeout=3)
-        except Exception as e:
-            # If check routine fails unexpectedly, treat as not connected
-            ok = False
-            err = str(e)
+        """Periodic check: chạy probe trên thread pool, kết quả trả về _on_connectivity_result."""
+        if self._probe_inflight:
+            return  # Probe trước chưa xong, bỏ qua lượt này
+        self._probe_inflight = True
+        QThreadPool.globalInstance().start(ConnectivityProbe(self._connectivity_signals))
+
+    def _on_connectivity_result(self, ok, err):
+        """If internet unreachable, show dialog and exit app on OK."""
+        self._probe_inflight = False
+
+        if ok:
+            self._connectivity_attempts = 0
+            self.connectivity_timer.setInterval(self._connectivity_healthy_interval)
+            return
 
-        if not ok:
-            # Stop timer to avoid repeated dialogs
-            try:
-                self.connectivity_timer.stop()
-            except Exception:
-                pass
+        self._connectivity_attempts += 1
+        if self._connectivity_attempts < self._connectivity_max_failures:
+            # Retry sớm với exponential backoff trước khi kết luận mất mạng
+            self.connectivity_timer.setInterval(1000 * 2 ** (self._connectivity_attempts - 1))
+            return
 
-            # Show critical dialog and then quit fully when user acknowledges
-            msg = QMessageBox(self.main_window)
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setWindowTitle("Connection Lost")
-            msg.setText("Internet connection appears to be lost.")
-            info = f"Details: {err}" if err else ""
-            msg.setInformativeText(info + "\n\nClick OK to close the application.")
-            msg.setStandardButtons(QMessageBox.StandardButton.Ok)
-            # Ensure dialog text/buttons are rendered in black for readability
-            msg.setStyleSheet("QLabel{color: #000000;} QPushButton{color: #000000;}")
-            try:
-                msg.exec()
-            except Exception:
-                pass
+        # Stop timer to avoid repeated dialogs
+        try:
+            self.connectivity_timer.stop()
+        except Exception:
+            pass
 
-            # Force a full exit
-            try:
-                self.quit()
-            finally:
-                # Ensure process exits
-                os._exit(0)
+        # Show critical dialog and then quit fully when user acknowledges
+        info = f"Details: {err}" if err else ""
+        try:
+            self._show_message(
+                "Connection Lost",
+                "Internet connection appears to be lost.",
+                QMessageBox.Icon.Critical,
+                info + "\n\nClick OK to close the application."
+            )
+        except Exception:
+            pass
+
+        # Thoát qua quit() để aboutToQuit -> cleanup_on_exit dọn dẹp server/timer
+        self.quit()
 
     # --- EXTENSION INTEGRATION ---
     def handle_incoming_link(self, url):
@@ -377,20 +502,19 @@ class AppManager(QApplication):
         """
         print(f"[AppManager] Received URL from extension: {url}")
         
-        # Import thêm QDialog để tạo container window
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout
-        
         # 1. Tạo cửa sổ dialog container
         dialog = QDialog(parent=None)
+        # Qt (C++) sở hữu và tự xóa dialog khi đóng, không cần giữ tham chiếu Python
+        sip.transferto(dialog, None)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
         dialog.setWindowTitle(f"TrueWeb - Analyzing: {url[:50]}...")
         dialog.setWindowFlags(Qt.WindowType.Window)  # Cửa sổ độc lập
         
-        # Set icon nếu có
-        if os.path.exists(self.icon_path):
-            from PyQt6.QtGui import QIcon
-            dialog.setWindowIcon(QIcon(self.icon_path))
+        # Set icon (icon rỗng nếu không tìm thấy file, Qt tự bỏ qua)
+        dialog.setWindowIcon(self.app_icon)
         
         # 2. Tạo SearchResultsPage đầy đủ với timeout từ settings
+        from frontend.result_page import SearchResultsPage
         timeout = cf.get_timeout()
         results_page = SearchResultsPage(url, timeout)
         
@@ -404,58 +528,74 @@ class AppManager(QApplication):
         results_page.back_to_home_requested.connect(dialog.close)
         
         # Khi analysis xong -> resize cửa sổ
-        results_page.analysis_finished.connect(lambda: self._expand_extension_window(dialog, results_page))
+        results_page.analysis_finished.connect(self._ext_finished)
         
         # Khi bấm Write Review
-        results_page.write_review_requested.connect(lambda: self._handle_extension_write_review(dialog, results_page))
+        results_page.write_review_requested.connect(self._ext_write_review)
         
-        # Khi đóng cửa sổ -> cleanup
-        dialog.finished.connect(lambda: self._cleanup_popup(dialog))
+        # Khi đóng cửa sổ -> giữ lại trang review dùng chung, xóa URL khỏi analyzed set
+        dialog.finished.connect(self._on_popup_finished)
         
         # 5. Set kích thước ban đầu (loading state)
         dialog.setFixedSize(750, 350)
         
         # 6. Thêm vào danh sách quản lý
-        self.active_popups.append(dialog)
+        self.active_popups.add(dialog)
+        self._latest_popup = weakref.ref(dialog)
         
         # 7. Center window
-        screen = dialog.screen()
-        if screen:
-            geom = screen.availableGeometry()
-            current_geo = dialog.frameGeometry()
-            current_geo.moveCenter(geom.center())
-            dialog.move(current_geo.topLeft())
+        self._center_window(dialog)
         
         # 8. Hiện cửa sổ (non-blocking - mỗi URL có cửa sổ riêng)
         dialog.show()
         dialog.raise_()
         dialog.activateWindow()
 
-    def _cleanup_popup(self, popup):
-        """Xóa popup khỏi danh sách quản lý khi người dùng tắt nó"""
-        if popup in self.active_popups:
-            self.active_popups.remove(popup)
-            popup.deleteLater()  # Giải phóng bộ nhớ hoàn toàn
+    # Các slot dưới đây lấy popup từ self.sender(): results_page luôn là con của dialog
+    def _ext_finished(self):
+        results_page = self.sender()
+        self._expand_extension_window(results_page.window(), results_page)
+
+    def _ext_write_review(self):
+        results_page = self.sender()
+        self._handle_extension_write_review(results_page.window(), results_page)
+
+    def _on_popup_finished(self, _result=0):
+        """Dọn dẹp trước khi Qt xóa popup (WA_DeleteOnClose)"""
+        popup = self.sender()
+        # Gỡ trang review dùng chung để nó không bị xóa cùng popup
+        if self._ext_review_target and self._ext_review_target[0] is popup:
+            self._detach_ext_write_review_page(popup)
+        self._cleanup_analyzed_url(popup)
+
+    def _get_latest_popup(self):
+        """Popup extension còn mở gần nhất, hoặc None"""
+        popup = self._latest_popup() if self._latest_popup else None
+        if popup is None or sip.isdeleted(popup):
+            popup = next((p for p in self.active_popups if not sip.isdeleted(p)), None)
+        return popup
     
     def _expand_extension_window(self, dialog, results_page):
         """Mở rộng cửa sổ extension khi analysis hoàn tất"""
         results_page.has_finished_loading = True
         dialog.setFixedSize(900, 700)
         
-        # Store URL in dialog for cleanup when closed
+        # Store URL in dialog for cleanup when closed (xem _on_popup_finished)
         dialog.analyzed_url = results_page.query_url
         
-        # Connect dialog close event to cleanup analyzed URLs
-        dialog.finished.connect(lambda: self._cleanup_analyzed_url(dialog))
-        
         # Center lại sau khi resize
-        screen = dialog.screen()
-        if screen:
-            geom = screen.availableGeometry()
-            current_geo = dialog.frameGeometry()
-            current_geo.moveCenter(geom.center())
-            dialog.move(current_geo.topLeft())
+        self._center_window(dialog)
     
+    def _get_ext_write_review_page(self):
+        """WriteReviewPage dùng chung cho mọi popup extension (tạo 1 lần)"""
+        if self._ext_write_review_page is None:
+            from frontend.write_review_page import WriteReviewPage
+            page = WriteReviewPage("Write Review")
+            page.cancelled.connect(self._on_ext_review_cancelled)
+            page.review_submitted.connect(self._on_ext_review_submitted)
+            self._ext_write_review_page = page
+        return self._ext_write_review_page
+
     def _handle_extension_write_review(self, dialog, results_page):
         """Xử lý Write Review từ extension window"""
         # Kiểm tra đăng nhập
@@ -463,8 +603,12 @@ class AppManager(QApplication):
             self._show_message("Login Required", "You need to log in to write a review!", QMessageBox.Icon.Warning)
             return
         
-        # Tạo WriteReviewPage trong extension window
-        write_review_page = WriteReviewPage("Write Review")
+        write_review_page = self._get_ext_write_review_page()
+
+        # Nếu trang review đang nằm ở popup khác -> trả popup đó về results view
+        if self._ext_review_target and self._ext_review_target[0] is not dialog:
+            self._restore_results_view(*self._ext_review_target)
+        write_review_page.reset_form()
         
         # Thay thế nội dung dialog bằng write review page
         # Clear layout cũ
@@ -476,22 +620,29 @@ class AppManager(QApplication):
             
             # Add write review page
             layout.addWidget(write_review_page)
+            write_review_page.setVisible(True)
             dialog.setFixedSize(600, 600)
             
             # Set dialog background to match write review page
-            dialog.setStyleSheet(f"QDialog {{ background-color: {cf.APP_BACKGROUND}; }}")
+            dialog.setStyleSheet(self._dialog_bg_style)
             
-            # Kết nối signals
-            write_review_page.cancelled.connect(lambda: self._restore_results_view(dialog, results_page, write_review_page))
-            write_review_page.review_submitted.connect(lambda score, comment: self._handle_extension_review_submit(dialog, results_page, write_review_page, score, comment))
+            # Ghi nhớ popup đang chứa trang review để xử lý signals
+            self._ext_review_target = (dialog, results_page)
     
-    def _restore_results_view(self, dialog, results_page, write_review_page):
+    def _detach_ext_write_review_page(self, dialog):
+        """Gỡ trang review dùng chung khỏi dialog (giữ lại instance, không xóa)"""
+        page = self._ext_write_review_page
+        layout = dialog.layout()
+        if layout:
+            layout.removeWidget(page)
+        page.setParent(None)
+        self._ext_review_target = None
+
+    def _restore_results_view(self, dialog, results_page):
         """Quay lại results page sau khi cancel review"""
+        self._detach_ext_write_review_page(dialog)
         layout = dialog.layout()
         if layout:
-            layout.removeWidget(write_review_page)
-            write_review_page.deleteLater()
-            
             results_page.setVisible(True)
             layout.addWidget(results_page)
             dialog.setFixedSize(900, 700)
@@ -499,29 +650,36 @@ class AppManager(QApplication):
             # Reset dialog background to default (remove green background)
             dialog.setStyleSheet("")
     
-    def _handle_extension_review_submit(self, dialog, results_page, write_review_page, score, comment):
+    def _on_ext_review_cancelled(self):
+        if self._ext_review_target:
+            self._restore_results_view(*self._ext_review_target)
+
+    def _on_ext_review_submitted(self, score, comment):
         """Xử lý submit review từ extension window"""
+        if not self._ext_review_target:
+            return
+        dialog, results_page = self._ext_review_target
         # Add review vào results page
         results_page.add_user_review(score, comment)
         
         # Quay lại results view
-        self._restore_results_view(dialog, results_page, write_review_page)
+        self._restore_results_view(dialog, results_page)
 
     def _cleanup_analyzed_url(self, dialog):
         """Remove URL from analyzed set when extension window closes"""
         if hasattr(dialog, 'analyzed_url'):
+            from backend import localserver
             url = dialog.analyzed_url
-            # Remove from localserver's analyzed_urls set
-            if url in localserver.analyzed_urls:
-                localserver.analyzed_urls.remove(url)
+            # Remove from localserver's analyzed URLs
+            if localserver.forget_url(url):
                 print(f"[AppManager] Removed {url} from analyzed URLs - can scan again")
     
     def focus_analyze_window(self):
         """Focus vào analyze window khi nhấn Ctrl+Shift+Space"""
         # Ưu tiên focus vào popup extension windows
-        if self.active_popups:
+        latest_popup = self._get_latest_popup()
+        if latest_popup is not None:
             # Focus vào popup mới nhất
-            latest_popup = self.active_popups[-1]
             if latest_popup.isMinimized():
                 latest_popup.showNormal()  # Restore if minimized
             latest_popup.show()  # Ensure visible
@@ -545,26 +703,41 @@ class AppManager(QApplication):
             print("[AppManager] No analyze window to focus")
     
     def cleanup_on_exit(self):
-        """Cleanup khi app đóng - xóa screenshots folder"""
+        """Cleanup khi app đóng - dừng timer, tắt local server, xóa screenshots folder"""
         from backend.take_screenshot import cleanup_screenshots_folder
         print("[AppManager] App closing - cleaning up...")
+
+        # 1. Dừng kiểm tra kết nối để không còn probe chạy sau khi thoát
+        self.connectivity_timer.stop()
+
+        # 2. Tắt Flask server và chờ luồng server kết thúc
+        if self.server_thread is not None:
+            from backend import localserver
+            localserver.shutdown()
+            self.server_thread.quit()
+            # run() thoát sau tối đa một vòng poll của waitress (~1s)
+            self.server_thread.wait(5000)
+
         cleanup_screenshots_folder()
     
     def handle_theme_change(self, is_dark):
         """Xử lý khi bật/tắt Dark Mode"""
         # 1. Cập nhật biến màu sắc toàn cục
         cf.set_mode(is_dark) 
+        self._dialog_bg_style = self._make_dialog_bg_style()
 
-        # 2. Cập nhật giao diện Container chính
-        self.main_window.update_ui()
-
-        # 3. Cập nhật giao diện các trang con (để chúng lấy màu mới)
-        self.home_page.update_ui()
-        self.login_page.update_ui()
-        self.write_review_page.update_ui()
-        self.settings_page.update_ui()
-        self.info_page.update_ui()
-
-        # 4. Nếu đang có trang kết quả, cũng phải cập nhật nó
-        if self.search_results_page_instance:
-            self.search_results_page_instance.update_ui()
\ No newline at end of file
+        # Tạm tắt repaint để mọi update_ui bên dưới chỉ gây 1 lần vẽ lại
+        self.main_window.setUpdatesEnabled(False)
+        try:
+            # 2. Cập nhật giao diện Container chính
+            self.main_window.update_ui()
+
+            # 3. Cập nhật giao diện các trang con (để chúng lấy màu mới), kể cả trang kết quả
+            # Trang chưa được tạo sẽ tự lấy màu mới khi khởi tạo
+            for page in (self.home_page, self.login_page, self.write_review_page, self.settings_page,
+                         self.info_page, self._ext_write_review_page, self.search_results_page_instance):
+                if page is not None:
+                    page.update_ui()
+        finally:
+            self.main_window.setUpdatesEnabled(True)
+            self.main_window.update()
@@ -1,8 +1,14 @@
 """
 Main module for extracting website information
 """
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 from typing import Optional
 from .utils.url_utils import normalize_url, extract_domain
 from .services.whois_service import get_whois_info
@@ -10,9 +16,63 @@ from .services.ip import get_a_records
 from .services.location import get_ip_geoinfo
 from .services.redirection import get_redirect_chain
 
+try:
+    # Optional: HTTP cache honoring ETag / Last-Modified (pip install cachecontrol[filecache])
+    from cachecontrol import CacheControl
+    from cachecontrol.caches.file_cache import FileCache
+except ImportError:
+    CacheControl = None
+
+try:
+    from diskcache import Cache as DiskCache  # Optional: lookups cached on disk across runs
+except ImportError:
+    DiskCache = None
+
+try:
+    import httpx  # Async fetch / redirect tracing for bulk scans
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx HTTP/2 support)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 # Disable SSL warnings when verify=False
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    # gzip/deflate (+ br khi có brotli) - urllib3 tự chọn theo codec đã cài
+    "Accept-Encoding": urllib3.util.make_headers(accept_encoding=True)["accept-encoding"],
+}
+WEB_CACHE_DIR = ".web_cache"
+
+
+def _make_session() -> requests.Session:
+    """Shared keep-alive session (pooled for parallel scans), cached on disk when possible"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if CacheControl is not None:
+        session = CacheControl(session, cache=FileCache(WEB_CACHE_DIR))
+    return session
+
+
+_SESSION = _make_session()
+
+MAX_CONTENT_BYTES = 512 * 1024
+_CHUNK_SIZE = 8192
+
+
+def _decode(raw: bytes, encoding: Optional[str]) -> str:
+    try:
+        return raw.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:  # unknown charset in Content-Type
+        return raw.decode('utf-8', errors='replace')
+
 
 def fetch_website_content(url: str, timeout: int = 5) -> Optional[str]:
     """
@@ -22,46 +82,127 @@ def fetch_website_content(url: str, timeout: int = 5) -> Optional[str]:
     # Ensure URL has a scheme
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+
     try:
-        response = requests.get(url, headers=headers, timeout=timeout, verify=False)
-        response.raise_for_status()
-        return response.text
+        # Stream + hard byte cap: downstream only keeps a few thousand characters
+        with _SESSION.get(url, headers=_HEADERS, timeout=timeout, verify=False, stream=True) as response:
+            response.raise_for_status()
+            chunks = []
+            total = 0
+            for chunk in response.iter_content(_CHUNK_SIZE):
+                chunks.append(chunk)
+                total += len(chunk)
+                if total >= MAX_CONTENT_BYTES:
+                    break
+            return _decode(b"".join(chunks), response.encoding)
     except requests.exceptions.RequestException as e:
         print(f"  [Content Fetch Error: {e}]")
         return None
 
 
-def get_website_info(url: str) -> dict:
-    """
-    Get comprehensive website information:
-    - Domain registration and expiration dates
-    - IP address
-    - Hosting information (country, ISP, city)
-    - Redirect chain behavior
+# TTL (seconds) per lookup type: WHOIS đổi theo tháng, DNS/geo ít đổi trong vài phút
+LOOKUP_TTL = {
+    "whois": 7 * 86400,
+    "a": 3600,
+    "geo": 86400,
+    "redirect": 600,
+}
+TRUEWEB_CACHE_DIR = os.getenv("TRUEWEB_CACHE_DIR", ".whois_cache")
 
-    Returns: dict containing all data
-    """
-    normalized_url = normalize_url(url)
-    domain = extract_domain(normalized_url)
 
-    result = {}
+class _MemoryTTLCache:
+    """In-process fallback with the same get/set(expire=) subset as diskcache.Cache"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value, expire=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + (expire or float("inf")), value)
+        return True
+
+
+def _make_lookup_cache():
+    if DiskCache is not None:
+        try:
+            return DiskCache(TRUEWEB_CACHE_DIR)
+        except Exception as e:
+            print(f"  [Lookup cache: cannot open {TRUEWEB_CACHE_DIR} ({e}), using memory]")
+    return _MemoryTTLCache()
+
+
+_LOOKUP_CACHE = _make_lookup_cache()
+
+
+def _cached_lookup(kind: str, key: str, func, ok):
+    """Return a cached lookup result, or call func(key) and cache it when ok(result)"""
+    cache_key = (kind, key)
+    value = _LOOKUP_CACHE.get(cache_key)
+    if value is not None:
+        return value
+    value = func(key)
+    if ok(value):
+        _LOOKUP_CACHE.set(cache_key, value, expire=LOOKUP_TTL[kind])
+    return value
+
+
+def _whois(domain: str) -> dict:
+    return _cached_lookup("whois", domain, get_whois_info,
+                          lambda v: not str(v.get("registration_date", "")).startswith("Error"))
+
+
+def _a_records(domain: str):
+    return _cached_lookup("a", domain, get_a_records, _has_records)
+
+
+def _geo(ip: str) -> dict:
+    return _cached_lookup("geo", ip, get_ip_geoinfo, lambda v: "error" not in v)
+
+
+def _redirect(url: str):
+    return _cached_lookup("redirect", url, get_redirect_chain, lambda v: v != _NO_REDIRECT_INFO)
+
+
+LOOKUP_TIMEOUT = 15  # seconds, per lookup in get_website_info
+_NO_REDIRECT_INFO = ("Unable to check (server may block automated requests)", None)
+
+
+def _future_result(future, name: str, default):
+    try:
+        return future.result(timeout=LOOKUP_TIMEOUT)
+    except Exception as e:
+        print(f"  [{name} lookup failed: {e}]")
+        return default
+
+
+def _has_records(a_records) -> bool:
+    return isinstance(a_records, list) and len(a_records) > 0
 
+
+def _fill_info(result: dict, whois_info, a_records, geo) -> None:
+    """Shared result layout for get_website_info / get_website_info_async"""
     # WHOIS info
-    whois_info = get_whois_info(domain)
+    whois_info = whois_info or {}
     result["Registration Date"] = whois_info.get("registration_date")
     result["Expiration Date"] = whois_info.get("expiration_date")
 
     # IP records
-    a_records = get_a_records(domain)
-    if isinstance(a_records, list) and len(a_records) > 0:
+    if _has_records(a_records):
         result["IP Address"] = a_records[0] if len(a_records) == 1 else a_records
-        
+
         # Hosting location from first IP
-        geo = get_ip_geoinfo(a_records[0])
         if "error" not in geo:
             location_parts = [geo.get("city"), geo.get("region"), geo.get("country")]
             location = ", ".join([p for p in location_parts if p])
@@ -75,9 +216,107 @@ def get_website_info(url: str) -> dict:
         result["Hosting Location"] = "Unknown"
         result["ISP"] = "Unknown"
 
-    # Redirection
-    result["Redirection"], result['Last url'] = get_redirect_chain(normalized_url)
 
+def get_website_info(url: str) -> dict:
+    """
+    Get comprehensive website information:
+    - Domain registration and expiration dates
+    - IP address
+    - Hosting information (country, ISP, city)
+    - Redirect chain behavior
+
+    Returns: dict containing all data
+    """
+    normalized_url = normalize_url(url)
+    domain = extract_domain(normalized_url)
+
+    result = {}
+
+    # WHOIS, A records and redirect chain are independent -> run in parallel;
+    # geo only depends on the first A record
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    try:
+        whois_future = executor.submit(_whois, domain)
+        a_future = executor.submit(_a_records, domain)
+        redir_future = executor.submit(_redirect, normalized_url)
+
+        # IP records
+        a_records = _future_result(a_future, "A records", [])
+        geo_future = None
+        if _has_records(a_records):
+            # Hosting location from first IP
+            geo_future = executor.submit(_geo, a_records[0])
+
+        whois_info = _future_result(whois_future, "WHOIS", {})
+        geo = _future_result(geo_future, "geo", {"error": "timeout"}) if geo_future is not None else None
+        _fill_info(result, whois_info, a_records, geo)
+
+        # Redirection
+        result["Redirection"], result['Last url'] = _future_result(redir_future, "redirect chain", _NO_REDIRECT_INFO)
+    finally:
+        executor.shutdown(wait=False)
+
+    return result
+
+
+async def fetch_website_content_async(url: str, timeout: int = 5) -> Optional[str]:
+    """
+    Async version of fetch_website_content (httpx, HTTP/2 when h2 is installed)
+    for pipelines that scan many URLs at once.
+    """
+    if httpx is None:
+        return await asyncio.to_thread(fetch_website_content, url, timeout)
+
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    try:
+        async with httpx.AsyncClient(http2=_HTTP2, verify=False, headers=_HEADERS,
+                                     timeout=timeout, follow_redirects=True) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks = []
+                total = 0
+                async for chunk in response.aiter_bytes(_CHUNK_SIZE):
+                    chunks.append(chunk)
+                    total += len(chunk)
+                    if total >= MAX_CONTENT_BYTES:
+                        break
+                return _decode(b"".join(chunks), response.encoding)
+    except httpx.HTTPError as e:
+        print(f"  [Content Fetch Error: {e}]")
+        return None
+
+
+async def _lookup_async(name: str, func, *args, default=None):
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func, *args), LOOKUP_TIMEOUT)
+    except Exception as e:
+        print(f"  [{name} lookup failed: {e}]")
+        return default
+
+
+async def get_website_info_async(url: str) -> dict:
+    """Async version of get_website_info (same result dict)"""
+    normalized_url = normalize_url(url)
+    domain = extract_domain(normalized_url)
+
+    async def _a_and_geo():
+        a_records = await _lookup_async("A records", _a_records, domain, default=[])
+        geo = None
+        if _has_records(a_records):
+            geo = await _lookup_async("geo", _geo, a_records[0], default={"error": "timeout"})
+        return a_records, geo
+
+    whois_info, (a_records, geo), redirect = await asyncio.gather(
+        _lookup_async("WHOIS", _whois, domain, default={}),
+        _a_and_geo(),
+        _lookup_async("redirect chain", _redirect, normalized_url, default=_NO_REDIRECT_INFO),
+    )
+
+    result = {}
+    _fill_info(result, whois_info, a_records, geo)
+    result["Redirection"], result['Last url'] = redirect
     return result
 
 
@@ -1,278 +1,335 @@
-from datetime import datetime
-from collections import Counter
+import threading
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import Optional
+from urllib.parse import urlparse
+import numpy as np
 from .pattern_analysis import check_domain_pattern
 from .protocol import check_protocol_security
 from .ssl_certificate import check_ssl_certificate
 from .html_heuristic import check_html_heuristics
 from .reputation import check_reputation
 from .AI_confidence import check_ai_confidence
+from .DAandSR import fetch_website_content
 from .utils.url_utils import extract_parent_url
 
-def _create_report():
-    return {
-        "score": 0.0,
-        "details": []
-    }
+logger = logging.getLogger(__name__)
+
+# Tiền tố HTML dùng lặp lại trong details
+_P_SCORE = "<b>Score:</b> "
+_P_ERR = "<b>ERROR:</b> "
+_P_IP = "<b>IP Address:</b> "
+_P_LOC = "<b>Hosting Location:</b> "
+_P_ISP = "<b>ISP:</b> "
+_P_RED = "<b>Redirection:</b> "
+_P_AGE = "<b>Domain Age:</b> "
+_NO_DATA = ("<b>Status:</b> No data available",)
+
+@dataclass(slots=True)
+class ScoreReport:
+    """Result of one *_score check (score 0.0-1.0, None = no data)"""
+    score: Optional[float] = 0.0
+    details: list = field(default_factory=list)
+
+    # Dict-style access cho code cũ (scoring_system, result_page) vẫn dùng report.get('score')
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def asdict(self) -> dict:
+        return asdict(self)
+
+# Thứ tự cố định của các tiêu chí AI (thang 0-4)
+_RISK_KEYS = ('sexual', 'violence', 'hate', 'self_harm', 'scam')
+_RISK_LABELS = ('Sexual', 'Violence', 'Hate', 'Self-harm', 'Scam/Phishing')
+_SCAM = _RISK_KEYS.index('scam')
+_CAP = np.float32(4.0)
+_REVIEW_BUCKETS_PER_POINT = 10  # User review 0.0-10.0, bước 0.1
+_REVIEW_BUCKETS = 10 * _REVIEW_BUCKETS_PER_POINT + 1
+# Server reliability: số thành phần của Hosting Location (1, 2, 3+) -> điểm / nhãn
+_LOCATION_SCORES = (0.0, 0.05, 0.15, 0.25)
+_LOCATION_LABELS = ("", "Minimal", "Partial", "Full")
+_REDIR_BLOCK = ("Unable to check", "server may block")
+
+@lru_cache(maxsize=4096)
+def _hostname(url: str) -> str:
+    return urlparse(url).hostname or url.split('://', 1)[-1].split('/', 1)[0]
+
+def _is_transient(result) -> bool:
+    """No-data results and ones the checker flagged "transient" (network failure) are not cached"""
+    if not isinstance(result, dict):
+        return True
+    return result.get("sub_score") is None or bool(result.get("transient"))
+
+def _copy_result(result: dict) -> dict:
+    """Bản sao cho caller: details (list) không dùng chung với cache"""
+    result = dict(result)
+    if isinstance(result.get("details"), list):
+        result["details"] = list(result["details"])
+    return result
+
+def _ttl_cached(ttl: float, maxsize: int = 4096):
+    """Thread-safe LRU + TTL cache keyed on the positional args (hostname, url)"""
+    def deco(fn):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                item = cache.get(args)
+                if item is not None and item[0] > now:
+                    cache.move_to_end(args)
+                    return _copy_result(item[1])
+            result = fn(*args)
+            if not _is_transient(result):
+                with lock:
+                    cache[args] = (now + ttl, result)
+                    cache.move_to_end(args)
+                    if len(cache) > maxsize:
+                        cache.popitem(last=False)
+                return _copy_result(result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return deco
+
+# Kết quả mạng chỉ phụ thuộc hostname -> cache theo TTL (AI / HTML phụ thuộc nội dung, không cache)
+@_ttl_cached(ttl=3600)
+def _cached_ssl(hostname: str):
+    return check_ssl_certificate(hostname)
+
+@_ttl_cached(ttl=3600)
+def _cached_protocol(hostname: str):
+    return check_protocol_security(hostname)
+
+@_ttl_cached(ttl=1800)
+def _cached_reputation(hostname: str, url: str):
+    return check_reputation(hostname, url)
+
+def _error_details(e):
+    return [f"{_P_ERR}{str(e)}"]
+
+def _scored(default_score=0.0, failure_details=_error_details):
+    """Shared exception guard for the *_score checks: log + fallback report"""
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                logger.exception("%s failed", fn.__name__)
+                return ScoreReport(default_score, failure_details(e))
+        return wrapper
+    return deco
 
 def _safe_get_details(result):
     """Safely extract details from module result"""
-    details = result.get("details", [])
-    if isinstance(details, list):
-        return details if details else ["<b>Status:</b> No data available"]
-    elif isinstance(details, str):
-        return [details] if details else ["<b>Status:</b> No data available"]
-    else:
-        return ["<b>Status:</b> No data available"]
+    details = result.get("details")
+    # Hầu hết là list khác rỗng -> kiểm tra trước; `__class__ is` rẻ hơn isinstance
+    if details.__class__ is list:
+        if details:
+            return details
+    elif details.__class__ is str:
+        if details:
+            return [details]
+    elif isinstance(details, (list, str)) and details:  # subclass hiếm gặp
+        return list(details) if isinstance(details, list) else [details]
+    return list(_NO_DATA)
 
-def certificate_score(url: str):
+@_scored()
+def certificate_score(url: str, hostname: str = None):
     """SSL Certificate check - returns score 0.0-1.0"""
-    try:
-        from urllib.parse import urlparse
-        hostname = urlparse(url).hostname or url.replace('https://', '').replace('http://', '').split('/')[0]
-        
-        result = check_ssl_certificate(hostname)
-        report = {
-            "score": result.get("sub_score", 0.0),
-            "details": _safe_get_details(result)
-        }
-        return report
-    except Exception as e:
-        print(f"[ERROR] certificate_score: {e}")
-        return {"score": 0.0, "details": [f"<b>ERROR:</b> {str(e)}"]}
+    hostname = hostname or _hostname(url)
 
-def domain_pattern_score(url: str): 
+    result = _cached_ssl(hostname)
+    return ScoreReport(result.get("sub_score", 0.0), _safe_get_details(result))
+
+@_scored()
+def domain_pattern_score(url: str, hostname: str = None):
     """Domain pattern analysis - returns score 0.0-1.0"""
-    try:
-        from urllib.parse import urlparse
-        hostname = urlparse(url).hostname or url.replace('https://', '').replace('http://', '').split('/')[0]
-        
-        result = check_domain_pattern(hostname)
-        report = {
-            "score": result.get("sub_score", 0.0),
-            "details": _safe_get_details(result)
-        }
-        return report
-    except Exception as e:
-        print(f"[ERROR] domain_pattern_score: {e}")
-        return {"score": 0.0, "details": [f"<b>ERROR:</b> {str(e)}"]}
+    hostname = hostname or _hostname(url)
+
+    result = check_domain_pattern(hostname)
+    return ScoreReport(result.get("sub_score", 0.0), _safe_get_details(result))
 
+@_scored()
 def html_score(url:str, html_content: str = None):
     """HTML heuristic check - returns score 0.0-1.0"""
-    try:
-        # If HTML content not provided, fetch it
-        if not html_content:
-            from .DAandSR import fetch_website_content
-            html_content = fetch_website_content(url)
-        
-        result = check_html_heuristics(html_content, url)
-        report = {
-            "score": result.get("sub_score", 0.0),
-            "details": _safe_get_details(result)
-        }
-        return report
-    except Exception as e:
-        print(f"[ERROR] html_score: {e}")
-        return {"score": 0.0, "details": [f"<b>ERROR:</b> {str(e)}"]}
+    # If HTML content not provided, fetch it
+    if not html_content:
+        html_content = fetch_website_content(url)
+
+    result = check_html_heuristics(html_content, url)
+    return ScoreReport(result.get("sub_score", 0.0), _safe_get_details(result))
 
-def protocol_score(url:str):
+@_scored()
+def protocol_score(url:str, hostname: str = None):
     """Protocol security check - returns score 0.0-1.0"""
-    try:
-        from urllib.parse import urlparse
-        hostname = urlparse(url).hostname or url.replace('https://', '').replace('http://', '').split('/')[0]
-        
-        result = check_protocol_security(hostname)
-        report = {
-            "score": result.get("sub_score", 0.0),
-            "details": _safe_get_details(result)
-        }
-        return report
-    except Exception as e:
-        print(f"[ERROR] protocol_score: {e}")
-        return {"score": 0.0, "details": [f"<b>ERROR:</b> {str(e)}"]}
+    hostname = hostname or _hostname(url)
+
+    result = _cached_protocol(hostname)
+    return ScoreReport(result.get("sub_score", 0.0), _safe_get_details(result))
 
-def reputationDB_score(url: str):
+@_scored()
+def reputationDB_score(url: str, hostname: str = None):
     """Reputation database check - returns score 0.0-1.0"""
-    try:
-        from urllib.parse import urlparse
-        hostname = urlparse(url).hostname or url.replace('https://', '').replace('http://', '').split('/')[0]
-        
-        result = check_reputation(hostname, url)
-        report = {
-            "score": result.get("sub_score", 0.0),
-            "details": _safe_get_details(result)
-        }
-        return report
-    except Exception as e:
-        print(f"[ERROR] reputationDB_score: {e}")
-        return {"score": 0.0, "details": [f"<b>ERROR:</b> {str(e)}"]}
+    hostname = hostname or _hostname(url)
+
+    result = _cached_reputation(hostname, url)
+    return ScoreReport(result.get("sub_score", 0.0), _safe_get_details(result))
 
+# Return neutral score on unexpected errors
+@_scored(0.5, lambda e: [
+    "<b>AI Analysis Status:</b> Analysis failed unexpectedly",
+    f"<b>Error:</b> {str(e)}"
+])
 def AI_score(url: str, extracted_text: str = None):
     """AI confidence check - returns score 0.0-1.0"""
-    try:
-        ai_response =  check_ai_confidence(url, extracted_text=extracted_text)
-        report = _create_report()
+    ai_response =  check_ai_confidence(url, extracted_text=extracted_text)
+    report = ScoreReport()
 
-        if not ai_response['status']:
-            error_detail = ai_response['details'] if isinstance(ai_response['details'], list) else [ai_response['details']]
-            error_msg = error_detail[0] if error_detail else 'Unknown error'
-            
-            # Check if it's NO DATA state (no content extracted)
-            if ai_response.get('no_data') or error_msg == 'NO_DATA':
-                # Return NO DATA state (yellow, like user review with no data)
-                report['score'] = None  # None means no data, will be excluded from scoring
-                report['details'] = ["<b>No data available</b> - Unable to extract website content"]
-                return report
-            
-            # Check if it's rate limiting (return no data like user review)
-            if 'rate limit' in error_msg.lower():
-                # Return NO DATA state (same as user review with no data)
-                report['score'] = None  # None means no data, will be excluded from scoring
-                report['details'] = ["<b>No data available</b> - AI service rate limited"]
-                return report
-            
-            # Other errors: also exclude from scoring (not neutral 0.5)
-            # This ensures failed modules don't artificially affect the score
-            report['score'] = None  # None means excluded from scoring
-            report['details'] = [
-                "<b>No data available</b> - AI service unavailable",
-                f"<b>Reason:</b> {error_msg}"
-            ]
+    if not ai_response['status']:
+        error_detail = ai_response['details'] if isinstance(ai_response['details'], list) else [ai_response['details']]
+        error_msg = error_detail[0] if error_detail else 'Unknown error'
+
+        # Check if it's NO DATA state (no content extracted)
+        if ai_response.get('no_data') or error_msg == 'NO_DATA':
+            # Return NO DATA state (yellow, like user review with no data)
+            report.score = None  # None means no data, will be excluded from scoring
+            if ai_response.get('no_data_reason') == 'fast_path':
+                report.details = ["<b>No data available</b> - Short page without risk indicators, AI analysis skipped"]
+            else:
+                report.details = ["<b>No data available</b> - Unable to extract website content"]
             return report
 
-        details = []
-        
-        # Lấy dữ liệu từ AI response
-        scores = ai_response.get("scores", {})
-        brand = ai_response.get("impersonated_brand", "N/A")
-        summary = ai_response.get("content_summary", "")
-        reasoning = ai_response.get("reasoning", "")
-        keywords = ai_response.get("content_keywords", [])
-        recommendations = ai_response.get("alternative_recommendations", [])
-
-        # 2. Lấy các điểm thành phần (Giả định đầu vào thang 0-4)
-        sexual_score = float(scores.get("sexual", 0))
-        violence_score = float(scores.get("violence", 0))
-        hate_score = float(scores.get("hate", 0))
-        self_harm_score = float(scores.get("self_harm", 0))
-        
-        # 3. Tính điểm an toàn
-        # Bước A: Tính an toàn cho từng tiêu chí (4 - điểm)
-        safe_sexual = max(0, 4.0 - sexual_score)
-        safe_violence = max(0, 4.0 - violence_score)
-        safe_hate = max(0, 4.0 - hate_score)
-        safe_self_harm = max(0, 4.0 - self_harm_score)
-
-        # Bước B: Tính trung bình cộng
-        avg_safety_raw = (safe_sexual + safe_violence + safe_hate + safe_self_harm) / 4.0
-        
-        # Bước C: Quy đổi sang thang 1.0 (4 điểm raw = 1.0 điểm final => chia 4)
-        safety_score = avg_safety_raw / 4.0  # 0.0 - 1.0
-
-        # Xử lý hiển thị "Notable Risks"
-        notable_risks = []
-        
-        if sexual_score >= 2: notable_risks.append(f"Sexual ({sexual_score})")
-        if violence_score >= 2: notable_risks.append(f"Violence ({violence_score})")
-        if hate_score >= 2: notable_risks.append(f"Hate ({hate_score})")
-        if self_harm_score >= 2: notable_risks.append(f"Self-harm ({self_harm_score})")
-
-        if notable_risks:
-            details.append(f"<b>⚠️ Notable Risks (Level >= 2):</b> {', '.join(notable_risks)}")
-        elif safety_score < 1.0:
-            details.append("<b>Content Status:</b> Minor flags detected")
-        else:
-            details.append("<b>Content Status:</b> Safe content")
-
-        # 4. Xử lý Mạo danh thương hiệu
-        if brand and brand.lower() not in ["none", "n/a", "unknown", "null"]:
-            safety_score = min(safety_score, 0.2)  # Cap điểm tối đa là 0.2 nếu mạo danh
-            details.append(f"<b>CRITICAL:</b> Potential impersonation of brand '{brand}'")
-        
-        # 5. Thêm thông tin bổ sung
-        if summary:
-            details.append(f"<b>Summary:</b> {summary}")
-        
-        if reasoning:
-            details.append(f"<b>AI Analysis:</b> {reasoning}")
-            
-        if keywords:
-            details.append(f"<b>Keywords:</b> {', '.join(keywords[:5])}")
-
-        if recommendations:
-            rec_names = [rec.get("name", "Unknown") for rec in recommendations]
-            details.append(f"<b>Alternatives:</b> {', '.join(rec_names)}")
-
-        # 6. Đóng gói kết quả (0.0 - 1.0)
-        final_score = max(0.0, min(1.0, safety_score))
-        
-        report["score"] = round(final_score, 2)
-        report["details"] = details
-        
+        # Check if it's rate limiting (return no data like user review)
+        if 'rate limit' in error_msg.lower():
+            # Return NO DATA state (same as user review with no data)
+            report.score = None  # None means no data, will be excluded from scoring
+            report.details = ["<b>No data available</b> - AI service rate limited"]
+            return report
+
+        # Other errors: also exclude from scoring (not neutral 0.5)
+        # This ensures failed modules don't artificially affect the score
+        report.score = None  # None means excluded from scoring
+        report.details = [
+            "<b>No data available</b> - AI service unavailable",
+            f"<b>Reason:</b> {error_msg}"
+        ]
         return report
-    except Exception as e:
-        print(f"[ERROR] AI_score: {e}")
-        import traceback
-        traceback.print_exc()
-        # Return neutral score on unexpected errors
-        return {
-            "score": 0.5, 
-            "details": [
-                "<b>AI Analysis Status:</b> Analysis failed unexpectedly",
-                f"<b>Error:</b> {str(e)}"
-            ]
-        }
-
-def domain_age_score(website_info:dict):
-    """Domain age check - returns score 0.0-1.0"""
+
+    # Lấy dữ liệu từ AI response
+    scores = ai_response.get("scores", {})
+    brand = ai_response.get("impersonated_brand", "N/A")
+    summary = ai_response.get("content_summary", "")
+    reasoning = ai_response.get("reasoning", "")
+    keywords = ai_response.get("content_keywords", [])
+    recommendations = ai_response.get("alternative_recommendations", [])
+
+    # 2. Lấy các điểm thành phần (Giả định đầu vào thang 0-4)
+    raw = np.array([float(scores.get(k, 0)) for k in _RISK_KEYS], dtype=np.float32)
+
+    # 3. Tính điểm an toàn
+    # An toàn từng tiêu chí = max(0, 4 - điểm), lấy trung bình rồi quy đổi sang thang 1.0 (chia 4)
+    safety_score = float(np.clip(_CAP - raw, 0, None).mean()) / 4.0  # 0.0 - 1.0
+
+    # Xử lý hiển thị "Notable Risks"
+    notable_risks = [f"{_RISK_LABELS[i]} ({float(raw[i])})" for i in np.flatnonzero(raw >= 2)]
+
+    if notable_risks:
+        status_line = f"<b>⚠️ Notable Risks (Level >= 2):</b> {', '.join(notable_risks)}"
+    elif safety_score < 1.0:
+        status_line = "<b>Content Status:</b> Minor flags detected"
+    else:
+        status_line = "<b>Content Status:</b> Safe content"
+
+    # 4. Xử lý Mạo danh thương hiệu / lừa đảo (cap 0.2, không để trung bình các tiêu chí khác làm loãng)
+    brand_is_real = bool(brand) and brand.lower() not in ("none", "n/a", "unknown", "null")
+    if brand_is_real or raw[_SCAM] >= 3:
+        safety_score = min(safety_score, 0.2)
+
+    # 5. Thêm thông tin bổ sung (dòng rỗng/False bị bỏ)
+    details = [line for line in (
+        status_line,
+        brand_is_real and f"<b>CRITICAL:</b> Potential impersonation of brand '{brand}'",
+        summary and f"<b>Summary:</b> {summary}",
+        reasoning and f"<b>AI Analysis:</b> {reasoning}",
+        keywords and f"<b>Keywords:</b> {', '.join(islice(keywords, 5))}",
+        recommendations and f"<b>Alternatives:</b> {', '.join(rec.get('name', 'Unknown') for rec in islice(recommendations, 5))}",
+    ) if line]
+
+    # 6. Đóng gói kết quả (0.0 - 1.0)
+    final_score = max(0.0, min(1.0, safety_score))
+
+    report.score = round(final_score, 2)
+    report.details = details
+
+    return report
+
+def domain_age_score(website_info:dict, today_ordinal: Optional[int] = None):
+    """Domain age check - returns score 0.0-1.0
+
+    today_ordinal: date.toordinal() của hôm nay; batch tính một lần rồi truyền vào
+    """
     reg_date = website_info.get("Registration Date")
 
-    report = _create_report()
+    report = ScoreReport()
     details = []
     domain_age_score = 0.0
 
     if reg_date and reg_date != "Not available":
         try:
-            # Parse registration date
-            reg_datetime = datetime.strptime(reg_date, "%Y-%m-%d")
-            current_date = datetime.now()
+            # Parse registration date (YYYY-MM-DD) - parse tay, nhanh hơn strptime
+            reg_datetime = date(int(reg_date[:4]), int(reg_date[5:7]), int(reg_date[8:10]))
             
             # Calculate domain age in days
-            age_days = (current_date - reg_datetime).days
+            age_days = (today_ordinal or date.today().toordinal()) - reg_datetime.toordinal()
             age_years = age_days / 365.25
             
             # Calculate score: 1.0 for >= 1 year, proportional for < 1 year
             if age_years >= 1.0:
                 domain_age_score = 1.0
-                details.append(f"<b>Domain Age:</b> {age_years:.2f} years (>= 1 year)")
-                details.append(f"<b>Score:</b> {domain_age_score:.2f}/1.0 (maximum)")
+                details.append(f"{_P_AGE}{age_years:.2f} years (>= 1 year)")
+                details.append(f"{_P_SCORE}{domain_age_score:.2f}/1.0 (maximum)")
             else:
                 # Proportional score for domains < 1 year old
                 domain_age_score = age_years
-                details.append(f"<b>Domain Age:</b> {age_years:.2f} years (< 1 year)")
-                details.append(f"<b>Score:</b> {domain_age_score:.2f}/1.0 (proportional)")
+                details.append(f"{_P_AGE}{age_years:.2f} years (< 1 year)")
+                details.append(f"{_P_SCORE}{domain_age_score:.2f}/1.0 (proportional)")
             
             # Format date as dd-mm-yyyy
-            formatted_date = reg_datetime.strftime("%d-%m-%Y")
+            formatted_date = f"{reg_datetime.day:02d}-{reg_datetime.month:02d}-{reg_datetime.year}"
             details.append(f"<b>Registered:</b> {formatted_date}")
             details.append(f"<b>Age:</b> {age_days} days ({age_years:.2f} years)")
             
         except Exception as e:
-            details.append(f"<b>ERROR:</b> Domain age parsing failed ({e})")
-            details.append("<b>Score:</b> 0.00/1.0")
+            details.append(f"{_P_ERR}Domain age parsing failed ({e})")
+            details.append(_P_SCORE + "0.00/1.0")
     else:
         # Treat "not available" as an error to exclude from scoring
-        details.append("<b>ERROR:</b> Domain age registration date not available")
+        details.append(_P_ERR + "Domain age registration date not available")
         details.append("<b>Note:</b> Module excluded from final score calculation")
     
-    report["score"] = domain_age_score
-    report["details"] = details
+    report.score = domain_age_score
+    report.details = details
     return report
 
 def server_reliability_score(website_info: dict):
     """Server reliability check - returns score 0.0-1.0"""
 
-    report = _create_report()
-    details = []
+    report = ScoreReport()
 
     # Total score components (normalized to 1.0)
     # IP: 0.35, Location: 0.25, ISP: 0.25, Redirection: 0.15
@@ -283,98 +340,89 @@ def server_reliability_score(website_info: dict):
     if ip_address and ip_address != "Not found":
         ip_score = 0.35
         if isinstance(ip_address, list) and len(ip_address) > 1:
-            details.append(f"<b>IP Address:</b> {len(ip_address)} IPs found (multiple)")
+            ip_msg = f"{len(ip_address)} IPs found (multiple)"
         else:
-            details.append("<b>IP Address:</b> Found")
-        details.append(f"<b>Score:</b> {ip_score:.2f}/0.35")
+            ip_msg = "Found"
     else:
-        details.append("<b>IP Address:</b> Not found")
-        details.append(f"<b>Score:</b> {ip_score:.2f}/0.35")
+        ip_msg = "Not found"
     
     # 2. Hosting Location (0.25)
     location_score = 0.0
     location = website_info.get("Hosting Location")
     if location and location != "Unknown":
-        components = [c.strip() for c in location.split(",") if c.strip()]
-        if len(components) >= 3:
-            location_score = 0.25
-            details.append(f"<b>Hosting Location:</b> Full info ({location})")
-        elif len(components) >= 2:
-            location_score = 0.15
-            details.append(f"<b>Hosting Location:</b> Partial info ({location})")
-        elif len(components) >= 1:
-            location_score = 0.05
-            details.append(f"<b>Hosting Location:</b> Minimal info ({location})")
-        details.append(f"<b>Score:</b> {location_score:.2f}/0.25")
+        # DAandSR ghép "city, region, country" chỉ từ phần khác rỗng -> đếm dấu phẩy là đủ
+        comps = min(location.count(',') + 1, 3)
+        location_score = _LOCATION_SCORES[comps]
+        location_msg = f"{_LOCATION_LABELS[comps]} info ({location})"
     else:
-        details.append("<b>Hosting Location:</b> Unknown")
-        details.append(f"<b>Score:</b> {location_score:.2f}/0.25")
+        location_msg = "Unknown"
     
     # 3. ISP (0.25)
     isp_score = 0.0
     isp = website_info.get("ISP")
     if isp and isp != "Unknown":
         isp_score = 0.25
-        details.append(f"<b>ISP:</b> {isp}")
-        details.append(f"<b>Score:</b> {isp_score:.2f}/0.25")
+        isp_msg = isp
     else:
-        details.append("<b>ISP:</b> Unknown")
-        details.append(f"<b>Score:</b> {isp_score:.2f}/0.25")
+        isp_msg = "Unknown"
     
     # 4. Redirection (0.15)
     redirection_score = 0.0
     redirection = website_info.get("Redirection")
     if redirection:
-        if "Unable to check" in redirection or "server may block" in redirection:
+        redirection_score = 0.15
+        if redirection == "No redirection":
+            redirection_msg = "No redirection"
+        elif any(sentinel in redirection for sentinel in _REDIR_BLOCK):
             redirection_score = 0.075
-            details.append("<b>Redirection:</b> Unable to check completely")
-        elif redirection == "No redirection":
-            redirection_score = 0.15
-            details.append("<b>Redirection:</b> No redirection")
+            redirection_msg = "Unable to check completely"
         elif "->" in redirection:
-            redirect_count = redirection.count("->")
-            redirection_score = 0.15
-            details.append(f"<b>Redirection:</b> Chain detected ({redirect_count} redirect(s))")
+            redirection_msg = f"Chain detected ({redirection.count('->')} redirect(s))"
         else:
-            redirection_score = 0.15
-            details.append("<b>Redirection:</b> Checked")
-        details.append(f"<b>Score:</b> {redirection_score:.2f}/0.15")
+            redirection_msg = "Checked"
     else:
-        details.append("<b>Redirection:</b> Not available")
-        details.append(f"<b>Score:</b> {redirection_score:.2f}/0.15")
+        redirection_msg = "Not available"
     
     # Calculate total score
     total_score = ip_score + location_score + isp_score + redirection_score
     
-    report["score"] = round(total_score, 2)
-    report["details"] = details
+    report.score = round(total_score, 2)
+    report.details = [
+        _P_IP + ip_msg,
+        f"{_P_SCORE}{ip_score:.2f}/0.35",
+        _P_LOC + location_msg,
+        f"{_P_SCORE}{location_score:.2f}/0.25",
+        _P_ISP + isp_msg,
+        f"{_P_SCORE}{isp_score:.2f}/0.25",
+        _P_RED + redirection_msg,
+        f"{_P_SCORE}{redirection_score:.2f}/0.15",
+    ]
     return report
 
 def review_score(list_of_review: list):
     """User review score - returns score 0.0-1.0"""
 
-    report = _create_report()
+    report = ScoreReport()
 
     # When no reviews exist, mark as no-data to exclude from weight calculation
     # This way websites without reviews aren't penalized or rewarded
     if(len(list_of_review) == 0):
-        report['score'] = 0.0
-        report['details'] = [
+        report.score = 0.0
+        report.details = [
             "<b>NO-DATA:</b> No user reviews yet",
             "<b>Note:</b> Module excluded from final score calculation"
         ]
         return report
 
-    for review in list_of_review:
-        report['score'] += review["score"]
-    report['score'] /= len(list_of_review)
-    
-    # Normalize to 0.0-1.0 (reviews are already 0-10 scale)
-    report['score'] = report['score'] / 10.0
+    # Một lần duyệt: điểm 0.0-10.0 (1 chữ số thập phân) -> bucket theo 0.1, 101 bucket cố định
+    scores = np.fromiter((review["score"] for review in list_of_review), dtype=np.float64, count=len(list_of_review))
+    hist = np.bincount(np.rint(scores * _REVIEW_BUCKETS_PER_POINT).astype(np.intp), minlength=_REVIEW_BUCKETS)
 
-    list_scores = [review['score'] for review in list_of_review]
-    stats = Counter(list_scores)
+    # Normalize to 0.0-1.0 (reviews are already 0-10 scale)
+    report.score = float(scores.mean()) / 10.0
 
-    for score, count in sorted(stats.items(), key=lambda x: x[0], reverse=True):
-        report["details"].append(f"<b>Rated {score}:</b> by {count} users")
+    # Bucket cao -> thấp, đã có thứ tự sẵn, không cần sort
+    for bucket in np.flatnonzero(hist)[::-1]:
+        report.details.append(f"<b>Rated {bucket / _REVIEW_BUCKETS_PER_POINT}:</b> by {hist[bucket]} users")
     return report
+
@@ -1,15 +1,32 @@
+from types import MappingProxyType
+
+import numpy as np
+
 # --- SCORING WEIGHTS ---
 # Based on the project proposal (Table 1)
-SCORE_WEIGHTS = {
-    'Certificate details':          0.6,
-    'Server reliability':           0.8,
-    'Domain age':                   1.0,
-    'Domain pattern':               0.8,
-    'HTML content and behavior':    0.7,
-    'Protocol security':            0.8,
-    'AI analysis':                  1.5,
-    'Reputation Databases':         2.0,
-    'User review':                  0.1
-}
-
+SCORE_KEYS = (
+    'Certificate details',
+    'Server reliability',
+    'Domain age',
+    'Domain pattern',
+    'HTML content and behavior',
+    'Protocol security',
+    'AI analysis',
+    'Reputation Databases',
+    'User review',
+)
+SCORE_WEIGHTS = MappingProxyType(dict(zip(SCORE_KEYS, (
+    0.6,    # Certificate details
+    0.8,    # Server reliability
+    1.0,    # Domain age
+    0.8,    # Domain pattern
+    0.7,    # HTML content and behavior
+    0.8,    # Protocol security
+    1.5,    # AI analysis
+    2.0,    # Reputation Databases
+    0.1,    # User review
+))))
 
+# Vector theo thứ tự SCORE_KEYS (dùng cho tổng có trọng số bằng np.dot)
+SCORE_WEIGHTS_VEC = np.array([SCORE_WEIGHTS[k] for k in SCORE_KEYS], dtype=np.float64)
+SCORE_WEIGHTS_SUM = float(SCORE_WEIGHTS_VEC.sum())
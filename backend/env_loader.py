@@ -4,11 +4,20 @@ Searches for .env in multiple locations:
 1. Same directory as .exe (for easy editing without rebuild)
 2. Bundled backend/.env (included in .exe)
 """
+import functools
+import logging
 import os
 import sys
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
 
+# Đặt sau lần load đầu tiên -> các module import sau (hoặc process con) không parse lại .env
+_LOADED_FLAG = '_TRUEWEB_ENV_LOADED'
+
+
+
+@functools.lru_cache(maxsize=1)
 def get_env_path() -> Path:
     """
     Get .env file path with priority:
@@ -26,26 +35,25 @@ def get_env_path() -> Path:
         # Priority 1: Check for .env next to .exe (external, user-editable)
         external_env = exe_dir / '.env'
         if external_env.exists():
-            print(f"[ENV] Using external .env: {external_env}")
+            logger.info("Using external .env: %s", external_env)
             return external_env
         
         # Priority 2: Use bundled .env in _MEIPASS temp directory
         # sys._MEIPASS is the temp folder where PyInstaller extracts files
         bundled_env = Path(sys._MEIPASS) / 'backend' / '.env'
         if bundled_env.exists():
-            print(f"[ENV] Using bundled .env: {bundled_env}")
+            logger.info("Using bundled .env: %s", bundled_env)
             return bundled_env
         else:
-            print(f"[ENV WARNING] No .env found! Checked:")
-            print(f"  - External: {external_env}")
-            print(f"  - Bundled: {bundled_env}")
+            logger.warning("No .env found! Checked:\n  - External: %s\n  - Bundled: %s",
+                           external_env, bundled_env)
             # Return external path anyway (dotenv will handle missing file)
             return external_env
     else:
         # Running from source code (development mode)
         # Use backend/.env relative to this file
         dev_env = Path(__file__).parent / '.env'
-        print(f"[ENV] Development mode, using: {dev_env}")
+        logger.info("Development mode, using: %s", dev_env)
         return dev_env
 
 
@@ -54,14 +62,17 @@ def load_env():
     Load environment variables from .env file
     Call this at the start of any module that needs env vars
     """
+    if os.environ.get(_LOADED_FLAG):
+        return True
     try:
         from dotenv import load_dotenv
         env_path = get_env_path()
         load_dotenv(dotenv_path=env_path, override=True)
+        os.environ[_LOADED_FLAG] = '1'
         return True
     except ImportError:
-        print("[ENV WARNING] python-dotenv not installed")
+        logger.warning("python-dotenv not installed")
         return False
     except Exception as e:
-        print(f"[ENV ERROR] Failed to load .env: {e}")
+        logger.error("Failed to load .env: %s", e)
         return False
@@ -1,9 +1,12 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
+import asyncio
 import json
+import logging
 import os
+import weakref
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------
 # LOAD ENVIRONMENT VARIABLES
 # ---------------------------------------------------------
@@ -20,17 +23,74 @@ SERVICE_ACCOUNT_CONFIG = os.getenv('SERVICE_ACCOUNT_CONFIG')
 GOOGLE_CLIENT_CONFIG = os.getenv('GOOGLE_CLIENT_CONFIG')
 FIREBASE_WEB_API_KEY = os.getenv('FIREBASE_WEB_API_KEY')
 
+# Parse service account một lần lúc import (init() có thể được gọi nhiều lần)
+try:
+    _SA = json.loads(SERVICE_ACCOUNT_CONFIG) if SERVICE_ACCOUNT_CONFIG else None
+except json.JSONDecodeError:
+    logger.exception("SERVICE_ACCOUNT_CONFIG is not valid JSON")
+    _SA = None
+
 def init():
-    """Khởi tạo kết nối Firebase Admin"""
+    """Khởi tạo kết nối Firebase Admin (idempotent)"""
     try:
-        if SERVICE_ACCOUNT_CONFIG:
-            cred = credentials.Certificate(json.loads(SERVICE_ACCOUNT_CONFIG))
+        # Import muộn: firebase_admin nặng, chỉ trả phí khi thật sự dùng Firebase
+        import firebase_admin
+        from firebase_admin import credentials
+
+        if firebase_admin._apps:
+            return True
+        if _SA:
+            cred = credentials.Certificate(_SA)
             firebase_admin.initialize_app(cred)
             return True
         else:
             print('Cant load SERVICE_ACCOUNT_CONFIG')
             return False
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("Firebase Admin init failed")
         return False
 
+
+# ---------------------------------------------------------
+# FIRESTORE CLIENTS
+# ---------------------------------------------------------
+# AsyncClient (gRPC aio) gắn với event loop tạo ra nó -> mỗi loop một client + một lock
+_ASYNC_DBS = weakref.WeakKeyDictionary()
+
+
+def get_sync_db():
+    """Firestore client đồng bộ cho code chưa chuyển sang async (None nếu init thất bại)"""
+    if not init():
+        return None
+    from firebase_admin import firestore
+    return firestore.client()
+
+
+def _make_async_db():
+    if not init():
+        return None
+    import firebase_admin
+    from google.cloud import firestore
+
+    app = firebase_admin.get_app()
+    return firestore.AsyncClient(
+        project=app.project_id or (_SA or {}).get("project_id"),
+        credentials=app.credential.get_credential(),
+    )
+
+
+async def get_db():
+    """Firestore AsyncClient dùng chung trong event loop hiện tại (None nếu init thất bại)"""
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_DBS.get(loop)
+    if entry is None:
+        entry = _ASYNC_DBS[loop] = [asyncio.Lock(), None]
+    if entry[1] is None:
+        async with entry[0]:
+            if entry[1] is None:
+                try:
+                    # init/import firebase_admin chặn -> đẩy ra thread, không giữ event loop
+                    entry[1] = await asyncio.to_thread(_make_async_db)
+                except Exception:
+                    logger.exception("Firestore AsyncClient init failed")
+    return entry[1]
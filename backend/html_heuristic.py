@@ -8,10 +8,312 @@
 # [1] Zieni et al. 2023 - "Phishing or Not Phishing?..." (HTML-based features)
 # [2] Li et al. 2024 - "A State-of-the-art Review..." (Source code & behavioral indicators)
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from urllib.parse import urlparse, urljoin
-from typing import Dict, Any
+from typing import Any, Callable, NamedTuple, Optional
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
+import copy
+import hashlib
+import logging
 import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick  # Optional: pyahocorasick automaton cho trust badge keywords
+except ImportError:
+    ahocorasick = None
+
+# lxml (C binding của libxml2): parse + XPath trực tiếp, không bọc Tag của BS4.
+# Thiếu lxml thì dùng BeautifulSoup + html.parser.
+try:
+    import lxml.html as lxml_html
+    from lxml import etree
+except ImportError:
+    lxml_html = None
+
+# Anchor trỏ thẳng tới IPv4 (compile một lần cho cả process)
+_IP_LINK_RE = re.compile(r"https?://\d{1,3}(?:\.\d{1,3}){3}", re.IGNORECASE)
+
+# Fallback BS4: chỉ dựng cây cho các tag được phân tích (bỏ text, script, style, comment...).
+# <img> nằm trong <a> vẫn giữ được vì con của tag khớp được giữ nguyên -> find_parent("a") vẫn chạy.
+_STRAINER = SoupStrainer(["a", "form", "input", "iframe", "img"])
+
+# Có ít nhất một tag cần phân tích không (case-insensitive, <A HREF...> vẫn khớp)
+_ANALYSED_TAG_RE = re.compile(r"<(?:a|form|input|iframe|img)\b", re.IGNORECASE)
+# Ngắn hơn mức này thì không thể là trang HTML thật (lỗi, redirect rỗng, ...)
+_MIN_HTML_LEN = 64
+
+# width/height của iframe vô hình
+_ZERO_DIMS = frozenset(("0", "0px", "0%"))
+
+# iframe ẩn từ các domain này (analytics, ads, embed, CDN) không bị coi là đáng ngờ
+_LEGIT_IFRAME_DOMAINS = (
+    "google.com", "googletagmanager.com", "google-analytics.com",
+    "doubleclick.net", "facebook.com", "twitter.com", "youtube.com",
+    "cloudflare.com", "jsdelivr.net", "unpkg.com",
+)
+
+# Nav menu / badge lặp lại cùng href -> memo urlparse cho cả process
+_urlparse_cached = lru_cache(maxsize=4096)(urlparse)
+
+# Chặn chuột phải: oncontextmenu="return false" (mọi kiểu quote/khoảng trắng) hoặc check event.button==2
+_RIGHT_CLICK_RE = re.compile(
+    r"""oncontextmenu\s*=\s*["']?\s*return\s+false|event\.button\s*==\s*2""", re.IGNORECASE
+)
+
+
+# --- Thu thập tag: lxml + XPath compile sẵn, hoặc BS4 fallback; cùng một dạng dữ liệu ---
+class _PageTags(NamedTuple):
+    hrefs: list                 # href của mọi <a href>
+    form_actions: list          # action của từng <form> (None nếu thiếu)
+    input_types: list           # type của từng <input> (None nếu thiếu)
+    iframes: list               # attribute mapping của từng <iframe> (dict / lxml attrib)
+    imgs: list                  # element có .get(attr)
+    badge_href: Callable[[Any], Optional[str]]  # img -> href của <a href> gần nhất bao quanh
+
+
+_EMPTY_PAGE = _PageTags((), (), (), (), (), lambda img: None)
+
+if lxml_html is not None:
+    _XP_HREF = etree.XPath("//a/@href", smart_strings=False)
+    _XP_FORM = etree.XPath("//form")
+    _XP_INPUT = etree.XPath("//input")
+    _XP_IFRAME = etree.XPath("//iframe")
+    _XP_IMG = etree.XPath("//img")
+    # ancestor là trục ngược → [1] là <a href> gần nhất
+    _XP_BADGE_HREF = etree.XPath("ancestor::a[@href][1]/@href", smart_strings=False)
+
+
+def _lxml_badge_href(img) -> Optional[str]:
+    hrefs = _XP_BADGE_HREF(img)
+    return hrefs[0] if hrefs else None
+
+
+def _gather_lxml(html_content: str) -> _PageTags:
+    try:
+        root = lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # str có khai báo <?xml encoding=...?> → lxml chỉ nhận bytes
+        root = lxml_html.document_fromstring(html_content.encode("utf-8"))
+    except etree.ParserError:
+        # "Document is empty"
+        return _EMPTY_PAGE
+    return _PageTags(
+        _XP_HREF(root),
+        [f.get("action") for f in _XP_FORM(root)],
+        [i.get("type") for i in _XP_INPUT(root)],
+        [f.attrib for f in _XP_IFRAME(root)],
+        _XP_IMG(root),
+        _lxml_badge_href,
+    )
+
+
+def _bs4_badge_href(img) -> Optional[str]:
+    a_parent = img.find_parent("a", href=True)
+    return a_parent.get("href") if a_parent else None
+
+
+def _gather_bs4(html_content: str) -> _PageTags:
+    soup = BeautifulSoup(html_content, "html.parser", parse_only=_STRAINER)
+    form_actions = []
+    input_types = []
+    # Một lần duyệt cây cho cả <form> và <input>
+    for el in soup.find_all(("form", "input")):
+        if el.name == "form":
+            form_actions.append(el.get("action"))
+        else:
+            input_types.append(el.get("type"))
+    return _PageTags(
+        [a["href"] for a in soup.find_all("a", href=True)],
+        form_actions,
+        input_types,
+        [f.attrs for f in soup.find_all("iframe")],
+        soup.find_all("img"),
+        _bs4_badge_href,
+    )
+
+
+_gather_tags = _gather_lxml if lxml_html is not None else _gather_bs4
+
+
+# --- Trust badge keywords + allowlist domain theo loại badge ---
+_BADGE_KEYWORDS = (
+    # Generic “trustmark / certified / verified”
+    "trustmark", "trust mark", "trust seal", "site seal", "security seal",
+    "certified", "certification", "certificate", "verified", "validation",
+    "secure checkout", "secure payment", "safe shopping", "buyer protection",
+    "protected by", "secured by", "security verified", "privacy verified",
+    "security certified", "privacy certified", "compliance",
+
+    # Vietnam (Bộ Công Thương)
+    "bocongthuong", "bo cong thuong", "bộ công thương",
+    "online.gov.vn", "đã đăng ký", "da dang ky", "dang ky",
+    "đã thông báo", "da thong bao", "thong bao", "thông báo",
+
+    # DMCA
+    "dmca", "dmca.com", "protected by dmca", "dmca protection",
+    "dmca badge", "dmca certificate",
+
+    # TRUSTe / TrustArc
+    "truste", "trustarc", "powered by trustarc",
+    "privacy seal", "privacy certified", "privacy verified",
+    "privacy feedback", "dpf", "data privacy framework",
+
+    # BBB
+    "bbb", "better business bureau", "bbb accredited", "bbb accreditation",
+    "bbb rating", "bbb seal", "bbb business profile", "bbb a+",
+
+    # TrustedSite (also legacy McAfee Secure transition)
+    "trustedsite", "trusted site", "trustedsite certified",
+    "verified business", "business verified",
+    "mcafee secure", "mcafeesecure", "mcafee secure trustmark",
+
+    # Certificate Authority site-seals (global)
+    # DigiCert / GeoTrust / Thawte
+    "digicert", "digicert smart seal", "digicert secured",
+    "geotrust", "truebusiness id", "truebusinessid", "geotrust seal",
+    "thawte", "thawte seal",
+
+    # Sectigo / Comodo / TrustLogo
+    "sectigo", "comodo", "trustlogo", "trust logo", "sectigo trust seal",
+    "comodo secure", "comodo ssl", "point to verify", "idauthority",
+
+    # GlobalSign
+    "globalsign", "gmo globalsign", "globalsign seal", "secure site seal",
+
+    # Legacy Norton/Symantec wording (treat as suspicious unless verified to official domains)
+    "norton secured", "norton secure", "symantec seal", "symantec secured",
+)
+
+# allowlist domain theo từng loại badge (tối giản để tránh false-positive)
+_BADGE_EXPECTED_DOMAINS = {
+    # Vietnam registry
+    "bocongthuong": {"online.gov.vn"},
+    "bo cong thuong": {"online.gov.vn"},
+    "bộ công thương": {"online.gov.vn"},
+    "online.gov.vn": {"online.gov.vn"},
+
+    # DMCA: badge hợp lệ phải link về DMCA certificate/portal
+    "dmca": {"dmca.com"},
+
+    # TRUSTe / TrustArc: validation pages thường nằm trên truste/trustarc domains
+    "truste": {"truste.com", "trustarc.com", "privacy.truste.com", "privacy.trustarc.com"},
+    "trustarc": {"trustarc.com", "truste.com", "privacy.trustarc.com", "privacy.truste.com"},
+    "powered by trustarc": {"trustarc.com", "truste.com", "privacy.trustarc.com", "privacy.truste.com"},
+
+    # BBB: seal hợp lệ link về BBB profile
+    "bbb": {"bbb.org"},
+    "better business bureau": {"bbb.org"},
+    "bbb accredited": {"bbb.org"},
+    "bbb seal": {"bbb.org"},
+
+    # TrustedSite (và legacy McAfee Secure redirect qua TrustedSite)
+    "trustedsite": {"trustedsite.com"},
+    "trusted site": {"trustedsite.com"},
+    "mcafeesecure": {"trustedsite.com", "mcafeesecure.com"},
+    "mcafee secure": {"trustedsite.com", "mcafeesecure.com"},
+
+    # DigiCert / GeoTrust / Thawte site seals (CertCentral / Smart Seal)
+    "digicert": {"digicert.com"},
+    "geotrust": {"geotrust.com", "digicert.com"},
+    "thawte": {"thawte.com", "digicert.com"},
+
+    # Sectigo/Comodo TrustLogo
+    "sectigo": {"sectigo.com", "trustlogo.com"},
+    "comodo": {"sectigo.com", "trustlogo.com", "comodoca.com"},
+    "trustlogo": {"trustlogo.com", "sectigo.com"},
+
+    # GlobalSign
+    "globalsign": {"globalsign.com"},
+}
+
+# Thứ tự loại badge = thứ tự khai báo ở trên (loại khai báo trước được ưu tiên)
+# Đóng băng: domain -> tuple để str.endswith(tuple) so một lần ở C-level
+_BADGE_EXPECTED_DOMAINS = MappingProxyType(
+    {k: tuple(sorted(v)) for k, v in _BADGE_EXPECTED_DOMAINS.items()}
+)
+_BADGE_TYPES = tuple(_BADGE_EXPECTED_DOMAINS)
+_BADGE_TYPE_RANK = {k: i for i, k in enumerate(_BADGE_TYPES)}
+
+if ahocorasick is not None:
+    # Loại badge cũng là keyword -> một automaton quét text của badge đúng một lần,
+    # payload = thứ hạng loại badge (None nếu keyword chung chung)
+    _BADGE_AC = ahocorasick.Automaton()
+    for _kw in _BADGE_KEYWORDS:
+        _BADGE_AC.add_word(_kw, _BADGE_TYPE_RANK.get(_kw))
+    _BADGE_AC.make_automaton()
+    _BADGE_RE = None
+else:
+    # Fallback: một regex alternation cho bước phát hiện badge
+    _BADGE_AC = None
+    _BADGE_RE = re.compile("|".join(map(re.escape, _BADGE_KEYWORDS)))
+    # Loại badge: lookahead để bắt cả match chồng lấn ("powered by trustarc" chứa "trustarc");
+    # alternation theo thứ tự khai báo → tại mỗi vị trí, loại ưu tiên cao nhất khớp trước
+    _BADGE_TYPE_RE = re.compile("(?=(" + "|".join(map(re.escape, _BADGE_TYPES)) + "))")
+
+
+def _match_badge(text: str):
+    """(có khớp keyword badge không, loại badge đầu tiên khớp hoặc None)"""
+    if _BADGE_AC is not None:
+        ranks = [rank for _, rank in _BADGE_AC.iter(text)]
+        if not ranks:
+            return False, None
+        ranks = [r for r in ranks if r is not None]
+        return True, (_BADGE_TYPES[min(ranks)] if ranks else None)
+
+    if _BADGE_RE.search(text) is None:
+        return False, None
+    types = {m.group(1) for m in _BADGE_TYPE_RE.finditer(text)}
+    return True, (min(types, key=_BADGE_TYPE_RANK.__getitem__) if types else None)
+
+
+# LRU kết quả theo (blake2b(html), url); hash 100 KB rẻ hơn nhiều so với parse
+HTML_CACHE_SIZE = 256
+_HTML_CACHE: "OrderedDict[tuple, HtmlReport]" = OrderedDict()
+_HTML_CACHE_LOCK = threading.Lock()
+
+
+@dataclass(slots=True)
+class HtmlMetrics:
+    total_links: int = 0
+    null_links: int = 0
+    external_links: int = 0
+    forms: int = 0
+    hidden_inputs: int = 0
+    iframes: int = 0
+    hidden_iframes: int = 0
+    trust_badges_detected: int = 0
+    trust_badges_verified: int = 0
+    trust_badges_suspicious: int = 0
+
+
+@dataclass(slots=True)
+class HtmlReport:
+    """Kết quả check_html_heuristics (sub_score 1.0 = rất sạch)"""
+    sub_score: float = 1.0
+    details: Any = "HTML content appears normal."
+    warnings: list = field(default_factory=list)
+    null_link_ratio: float = 0.0
+    external_link_ratio: float = 0.0
+    has_login_form: bool = False
+    metrics: HtmlMetrics = field(default_factory=HtmlMetrics)
+
+    # Dict-style access cho code cũ (calculate_score.html_score vẫn dùng result.get('sub_score'))
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def asdict(self) -> dict:
+        return asdict(self)
 
 
 # --- Heuristic penalties (trừ từ base 1.0) ---
@@ -30,132 +332,131 @@ HTML_SCORES = {
 }
 
 
-def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
+def check_html_heuristics(html_content: str, full_url: str) -> HtmlReport:
     """
     Phân tích HTML content để tìm các chỉ số phishing (HTML + hành vi).
 
     Returns:
-        {
-            "sub_score": 0.0-1.0 (1.0 = rất sạch),
-            "details": "...",
-            "warnings": [...],
-            "null_link_ratio": float,
-            "external_link_ratio": float,
-            "has_login_form": bool,
-            "metrics": {
-                "total_links": int,
-                "null_links": int,
-                "external_links": int,
-                "forms": int,
-                "hidden_inputs": int,
-                "iframes": int,
-                "hidden_iframes": int
-            }
-        }
+        HtmlReport (slots dataclass; vẫn đọc được kiểu dict: report.get("sub_score"),
+        report["details"]; report.asdict() nếu cần dict/JSON):
+            sub_score: 0.0-1.0 (1.0 = rất sạch)
+            details, warnings, null_link_ratio, external_link_ratio, has_login_form
+            metrics: HtmlMetrics (total_links, null_links, external_links, forms,
+                     hidden_inputs, iframes, hidden_iframes, trust_badges_*)
     """
-    report: Dict[str, Any] = {
-        "sub_score": 1.0,
-        "details": "HTML content appears normal.",
-        "warnings": [],
-        "null_link_ratio": 0.0,
-        "external_link_ratio": 0.0,
-        "has_login_form": False,
-        "metrics": {
-            "total_links": 0,
-            "null_links": 0,
-            "external_links": 0,
-            "forms": 0,
-            "hidden_inputs": 0,
-            "iframes": 0,
-            "hidden_iframes": 0,
-            "trust_badges_detected": 0,
-            "trust_badges_verified": 0,
-            "trust_badges_suspicious": 0,
-        },
-    }
-
-    # Debug: log input HTML size and preview
-    try:
-        print(f"[DEBUG] check_html_heuristics: received html_content length={len(html_content)} for URL={full_url}")
-        if len(html_content) > 0:
-            print(f"[DEBUG] HTML preview (first 300 chars): {html_content[:300].replace('\n', ' ')}")
-    except Exception:
-        # defensive: don't crash the analyzer when printing
-        pass
-
     if not html_content:
+        return _analyze_html(html_content, full_url)
+
+    # Content-addressed: cùng HTML + URL (reload, phân tích lại) → trả lại kết quả cũ
+    key = (hashlib.blake2b(html_content.encode("utf-8", "surrogatepass"), digest_size=16).digest(), full_url)
+    with _HTML_CACHE_LOCK:
+        cached = _HTML_CACHE.get(key)
+        if cached is not None:
+            _HTML_CACHE.move_to_end(key)
+    if cached is not None:
+        logger.debug("HTML analysis cache hit for URL=%s", full_url)
+        return copy.deepcopy(cached)  # caller có thể sửa report → không trả object trong cache
+
+    report = _analyze_html(html_content, full_url)
+    with _HTML_CACHE_LOCK:
+        _HTML_CACHE[key] = copy.deepcopy(report)
+        if len(_HTML_CACHE) > HTML_CACHE_SIZE:
+            _HTML_CACHE.popitem(last=False)
+    return report
+
+
+def _analyze_html(html_content: str, full_url: str) -> HtmlReport:
+    """Phân tích thật sự (không cache) - xem check_html_heuristics"""
+    report = HtmlReport()
+
+    # Debug: log input HTML size and preview (chỉ tính preview khi bật DEBUG)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("check_html_heuristics: received html_content length=%s for URL=%s",
+                     len(html_content or ""), full_url)
+        if html_content:
+            logger.debug("HTML preview (first 300 chars): %s", html_content[:300].replace("\n", " "))
+
+    # Rỗng, quá ngắn hoặc không giống HTML (không có '<' ở đầu) → không đáng để parse
+    if not html_content or len(html_content) < _MIN_HTML_LEN or "<" not in html_content[:1024]:
         # Không có HTML để phân tích → giảm độ tin cậy một chút nhưng không kết luận xấu
-        report["details"] = ["<b>ERROR:</b> No HTML content to analyze (request blocked, non-HTML, hoặc lỗi tải trang)."]
-        report["sub_score"] = max(0.0, 1.0 - HTML_SCORES["NO_HTML_CONTENT"])
+        report.details = ["<b>ERROR:</b> No HTML content to analyze (request blocked, non-HTML, hoặc lỗi tải trang)."]
+        report.sub_score = max(0.0, 1.0 - HTML_SCORES["NO_HTML_CONTENT"])
         return report
 
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
+        # Không có tag nào cần phân tích → bỏ qua parse (mọi danh sách rỗng),
+        # right-click check vẫn quét html_content gốc ở mục 5
+        page = _gather_tags(html_content) if _ANALYSED_TAG_RE.search(html_content) else _EMPTY_PAGE
         parsed = urlparse(full_url)
         current_domain = parsed.netloc.lower()
-
-        # Debug: report parse outcome
-        try:
-            parsed_html_len = len(str(soup))
-            body_tag = bool(soup.find('body'))
-            print(f"[DEBUG] Parsed HTML length={parsed_html_len}, body_present={body_tag}, current_domain={current_domain}")
-        except Exception:
-            pass
+        logger.debug("Parsed HTML, current_domain=%s", current_domain)
 
         # ---------------------------------------------------------------------
         # 1. Link analysis (null links + external links)
         #    Ref: Zieni 2023 - null/foreign domain ratio là feature quan trọng.
         # ---------------------------------------------------------------------
-        all_links = soup.find_all("a", href=True)
-        total_links = len(all_links)
+        all_hrefs = page.hrefs
+        total_links = len(all_hrefs)
         null_count = 0
         external_count = 0
+        # Link trỏ tới IP (mục 6) cũng được dò luôn trong vòng lặp này
+        ip_link_found = False
+        ip_match = _IP_LINK_RE.match
 
         if total_links > 0:
-            for tag in all_links:
-                href = tag["href"].strip()
+            for href in all_hrefs:
+                # lower() một lần cho mọi phép so sánh bên dưới
+                href_l = href.strip().lower()
+
+                # Lọc trước bằng startswith + isdigit (C-level), chỉ chạy regex khi host bắt đầu bằng số
+                if not ip_link_found and (
+                    (href_l.startswith("http://") and href_l[7:8].isdigit())
+                    or (href_l.startswith("https://") and href_l[8:9].isdigit())
+                ) and ip_match(href_l):
+                    ip_link_found = True
 
                 # Null / broken / javascript links
                 if (
-                    href == ""
-                    or href == "#"
-                    or href.lower().startswith("javascript:void")
+                    href_l == ""
+                    or href_l == "#"
+                    or href_l.startswith("javascript:void")
                 ):
                     null_count += 1
                 # External link (absolute URL có domain khác)
-                elif href.lower().startswith("http"):
+                elif href_l.startswith("http"):
                     try:
-                        link_domain = urlparse(href).netloc.lower()
+                        # href đã lowercase → netloc cũng vậy; href trùng hoa/thường dùng chung cache
+                        link_domain = _urlparse_cached(href_l).netloc
                         if link_domain and link_domain != current_domain:
                             external_count += 1
                     except Exception:
                         # Nếu parse fail thì bỏ qua; không phạt thêm
                         pass
 
-            report["metrics"]["total_links"] = total_links
-            report["metrics"]["null_links"] = null_count
-            report["metrics"]["external_links"] = external_count
+            report.metrics.total_links = total_links
+            report.metrics.null_links = null_count
+            report.metrics.external_links = external_count
 
             # Debug: link metrics
-            print(f"[DEBUG] Links: total={total_links}, null={null_count}, external={external_count}")
+            logger.debug("Links: total=%s null=%s external=%s", total_links, null_count, external_count)
 
-            report["null_link_ratio"] = null_count / total_links
-            report["external_link_ratio"] = external_count / total_links
+            report.null_link_ratio = null_count / total_links
+            report.external_link_ratio = external_count / total_links
 
             # Penalty: nhiều null/broken links (chỉ cảnh báo khi > 40%)
-            if report["null_link_ratio"] > 0.4:
-                report["warnings"].append(
-                    f"High ratio of null/broken links ({report['null_link_ratio']:.1%})."
+            if report.null_link_ratio > 0.4:
+                report.warnings.append(
+                    f"High ratio of null/broken links ({report.null_link_ratio:.1%})."
                 )
-                report["sub_score"] -= HTML_SCORES["HIGH_NULL_LINK_RATIO"]
+                report.sub_score -= HTML_SCORES["HIGH_NULL_LINK_RATIO"]
 
             # Penalty: đa số link trỏ ra ngoài (chỉ cảnh báo khi > 80%)
             # Portal sites, Google, Wikipedia thường có nhiều external links hợp lệ
-            if report["external_link_ratio"] > 0.8:
-                report["warnings"].append(
-                    f"Unusually high external links ({report['external_link_ratio']:.1%})."
+            if report.external_link_ratio > 0.8:
+                report.warnings.append(
+                    f"Unusually high external links ({report.external_link_ratio:.1%})."
                 )
-                report["sub_score"] -= HTML_SCORES["HIGH_EXTERNAL_LINK_RATIO"]
+                report.sub_score -= HTML_SCORES["HIGH_EXTERNAL_LINK_RATIO"]
 
         # ---------------------------------------------------------------------
         # 2. Form analysis (login detection + cross-domain)
@@ -164,22 +465,26 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
         #    - Action rỗng / '#' → suspicious
         #    - Action absolute URL ra domain khác (không phải subdomain) → high risk
         # ---------------------------------------------------------------------
-        forms = soup.find_all("form")
-        inputs = soup.find_all("input")
-        report["metrics"]["forms"] = len(forms)
-
-        has_password_field = any(
-            (i.get("type") or "").lower() == "password" for i in inputs
-        )
+        # Một lượt qua input types: phát hiện password field + đếm hidden input (mục 3).
+        # Hidden input bị phạt kể cả khi không có form login, nên vẫn phải xem hết mọi input.
+        form_actions = page.form_actions
+        has_password_field = False
+        hidden_count = 0
+        for input_type in page.input_types:
+            input_type = (input_type or "").lower()
+            if input_type == "hidden":
+                hidden_count += 1
+            elif input_type == "password":
+                has_password_field = True
+        report.metrics.forms = len(form_actions)
 
         if has_password_field:
-            report["has_login_form"] = True
+            report.has_login_form = True
             suspicious_action_found = False
             external_action_found = False
 
-            for form in forms:
-                raw_action = form.get("action", "").strip()
-                action = raw_action or ""  # tránh None
+            for raw_action in form_actions:
+                action = (raw_action or "").strip()  # tránh None
 
                 if not action or action == "#":
                     # Form login mà action rỗng / '#' → rất đáng ngờ
@@ -188,7 +493,7 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
 
                 # Chuẩn hóa action thành URL đầy đủ rồi so domain
                 full_action_url = urljoin(full_url, action)
-                action_domain = urlparse(full_action_url).netloc.lower()
+                action_domain = _urlparse_cached(full_action_url).netloc.lower()
 
                 if action_domain and action_domain != current_domain:
                     # Cho phép subdomain <-> main domain (login.paypal.com vs paypal.com)
@@ -200,118 +505,94 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
                         external_action_found = True
 
             if external_action_found:
-                report["warnings"].append(
+                report.warnings.append(
                     "Login form posts credentials to external domain (cross-domain form submission)."
                 )
-                report["sub_score"] -= HTML_SCORES["SENSITIVE_FORM_EXTERNAL"]
+                report.sub_score -= HTML_SCORES["SENSITIVE_FORM_EXTERNAL"]
             elif suspicious_action_found:
-                report["warnings"].append(
+                report.warnings.append(
                     "Login form detected with suspicious/empty action attribute."
                 )
-                report["sub_score"] -= HTML_SCORES["SENSITIVE_FORM_SUSPICIOUS"]
+                report.sub_score -= HTML_SCORES["SENSITIVE_FORM_SUSPICIOUS"]
 
         # ---------------------------------------------------------------------
         # 3. Hidden inputs (có thể dùng để lén gửi thêm dữ liệu)
         #    Ref: Li 2024 - Source code indicators: nhiều hidden field bất thường.
         # ---------------------------------------------------------------------
-        hidden_inputs = soup.find_all("input", {"type": "hidden"})
-        hidden_count = len(hidden_inputs)
-        report["metrics"]["hidden_inputs"] = hidden_count
+        #    (hidden_count đã đếm cùng lượt với password field ở mục 2)
+        report.metrics.hidden_inputs = hidden_count
 
         # Modern forms thường có CSRF tokens, session IDs, tracking → chỉ cảnh báo khi > 15
         if hidden_count > 15:
-            report["warnings"].append(
+            report.warnings.append(
                 f"Suspiciously high number of hidden input fields ({hidden_count})."
             )
-            report["sub_score"] -= HTML_SCORES["MANY_HIDDEN_INPUTS"]
+            report.sub_score -= HTML_SCORES["MANY_HIDDEN_INPUTS"]
 
         # Debug: form/input metrics
-        try:
-            total_inputs = len(inputs)
-            print(f"[DEBUG] Forms: count={len(forms)}, total_inputs={total_inputs}, hidden_inputs={hidden_count}, has_password_field={has_password_field}")
-        except Exception:
-            pass
+        logger.debug("Forms: count=%s total_inputs=%s hidden_inputs=%s has_password_field=%s",
+                     len(form_actions), len(page.input_types), hidden_count, has_password_field)
 
         # ---------------------------------------------------------------------
         # 4. Iframes (đặc biệt là iframe ẩn)
         #    Ref: Zieni 2023 - invisible content / cloaking.
         # ---------------------------------------------------------------------
-        iframes = soup.find_all("iframe")
-        report["metrics"]["iframes"] = len(iframes)
+        iframes = page.iframes
+        report.metrics.iframes = len(iframes)
 
+        # Một lượt: gặp iframe ẩn thì xét luôn src của chính nó
         hidden_iframe_detected = False
-        for iframe in iframes:
-            style = (iframe.get("style") or "").lower()
-            width = (iframe.get("width") or "").strip()
-            height = (iframe.get("height") or "").strip()
+        is_suspicious = False
+        for attrs in iframes:
+            style = attrs.get("style", "").lower()
+            width = attrs.get("width", "").strip()
+            height = attrs.get("height", "").strip()
 
             # width/height đôi khi là số hoặc "0"
-            is_zero_size = width in ("0", "0px") or height in ("0", "0px")
+            is_zero_size = width in _ZERO_DIMS or height in _ZERO_DIMS
             is_hidden_style = "display:none" in style or "visibility:hidden" in style
 
             if is_zero_size or is_hidden_style:
                 hidden_iframe_detected = True
-                break
+                # iframe ẩn từ domain hợp lệ (analytics, ads, ...) thì bỏ qua, xét tiếp
+                src = attrs.get("src", "").lower()
+                if not any(domain in src for domain in _LEGIT_IFRAME_DOMAINS):
+                    is_suspicious = True
+                    break
 
         if hidden_iframe_detected:
-            report["metrics"]["hidden_iframes"] = 1
-            
-            # Check if iframe src is from known legitimate domains (analytics, ads, etc.)
-            legitimate_iframe_domains = [
-                "google.com", "googletagmanager.com", "google-analytics.com",
-                "doubleclick.net", "facebook.com", "twitter.com", "youtube.com",
-                "cloudflare.com", "jsdelivr.net", "unpkg.com"
-            ]
-            
-            is_suspicious = True
-            for iframe in iframes:
-                src = (iframe.get("src") or "").lower()
-                if any(domain in src for domain in legitimate_iframe_domains):
-                    is_suspicious = False
-                    break
-            
-            if is_suspicious:
-                report["warnings"].append(
-                    "Hidden iframe detected (possible cloaking/drive-by content)."
-                )
-                report["sub_score"] -= HTML_SCORES["HIDDEN_IFRAME_SUSPICIOUS"]
+            report.metrics.hidden_iframes = 1
+
+        if is_suspicious:
+            report.warnings.append(
+                "Hidden iframe detected (possible cloaking/drive-by content)."
+            )
+            report.sub_score -= HTML_SCORES["HIDDEN_IFRAME_SUSPICIOUS"]
 
         # Debug: iframe metrics
-        try:
-            print(f"[DEBUG] Iframes: total={len(iframes)}, hidden_detected={report['metrics'].get('hidden_iframes', 0)}")
-        except Exception:
-            pass
+        logger.debug("Iframes: total=%s hidden_detected=%s", len(iframes), report.metrics.hidden_iframes)
 
         # ---------------------------------------------------------------------
         # 5. Behavioral indicator: disable right-click
         #    Ref: Li 2024 - anti-analysis / obfuscation techniques.
         # ---------------------------------------------------------------------
-        html_lower = str(soup).lower()
-        if 'oncontextmenu="return false"' in html_lower or "event.button==2" in html_lower:
-            report["warnings"].append(
+        #    Quét thẳng HTML gốc (bắt cả event.button==2 trong <script>, không chỉ attribute)
+        if _RIGHT_CLICK_RE.search(html_content):
+            report.warnings.append(
                 "Right-click is disabled (anti-analysis / anti-user behavior)."
             )
-            report["sub_score"] -= HTML_SCORES["RIGHT_CLICK_DISABLED"]
+            report.sub_score -= HTML_SCORES["RIGHT_CLICK_DISABLED"]
 
         # ---------------------------------------------------------------------
         # 6. Links pointing to IP addresses
         #    Ref: Zieni 2023 - IP-based URLs là feature phổ biến.
         # ---------------------------------------------------------------------
-        ip_link_found = False
-        ip_pattern = re.compile(
-            r"https?://\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}", re.IGNORECASE
-        )
-        for tag in all_links:
-            href = tag["href"]
-            if ip_pattern.search(href):
-                ip_link_found = True
-                break
-
+        #    (ip_link_found đã tính trong vòng lặp link ở mục 1)
         if ip_link_found:
-            report["warnings"].append(
+            report.warnings.append(
                 "Contains hyperlinks pointing directly to IP addresses."
             )
-            report["sub_score"] -= HTML_SCORES["IP_ADDRESS_LINKS"]
+            report.sub_score -= HTML_SCORES["IP_ADDRESS_LINKS"]
 
         # ---------------------------------------------------------------------
         # 7. Trust badge / "certified by" seal checks (WEAK signal)
@@ -319,96 +600,7 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
         #    - Nếu badge/seal xuất hiện nhưng không có link kiểm chứng → đáng ngờ
         #    - Nếu có link nhưng domain không khớp nhà cung cấp seal → đáng ngờ
         # ---------------------------------------------------------------------
-        badge_imgs = soup.find_all("img")
-        badge_keywords = [
-            # Generic “trustmark / certified / verified”
-            "trustmark", "trust mark", "trust seal", "site seal", "security seal",
-            "certified", "certification", "certificate", "verified", "validation",
-            "secure checkout", "secure payment", "safe shopping", "buyer protection",
-            "protected by", "secured by", "security verified", "privacy verified",
-            "security certified", "privacy certified", "compliance",
-
-            # Vietnam (Bộ Công Thương)
-            "bocongthuong", "bo cong thuong", "bộ công thương",
-            "online.gov.vn", "đã đăng ký", "da dang ky", "dang ky",
-            "đã thông báo", "da thong bao", "thong bao", "thông báo",
-
-            # DMCA
-            "dmca", "dmca.com", "protected by dmca", "dmca protection",
-            "dmca badge", "dmca certificate",
-
-            # TRUSTe / TrustArc
-            "truste", "trustarc", "powered by trustarc",
-            "privacy seal", "privacy certified", "privacy verified",
-            "privacy feedback", "dpf", "data privacy framework",
-
-            # BBB
-            "bbb", "better business bureau", "bbb accredited", "bbb accreditation",
-            "bbb rating", "bbb seal", "bbb business profile", "bbb a+",
-
-            # TrustedSite (also legacy McAfee Secure transition)
-            "trustedsite", "trusted site", "trustedsite certified",
-            "verified business", "business verified",
-            "mcafee secure", "mcafeesecure", "mcafee secure trustmark",
-
-            # Certificate Authority site-seals (global)
-            # DigiCert / GeoTrust / Thawte
-            "digicert", "digicert smart seal", "digicert secured",
-            "geotrust", "truebusiness id", "truebusinessid", "geotrust seal",
-            "thawte", "thawte seal",
-
-            # Sectigo / Comodo / TrustLogo
-            "sectigo", "comodo", "trustlogo", "trust logo", "sectigo trust seal",
-            "comodo secure", "comodo ssl", "point to verify", "idauthority",
-
-            # GlobalSign
-            "globalsign", "gmo globalsign", "globalsign seal", "secure site seal",
-
-            # Legacy Norton/Symantec wording (treat as suspicious unless verified to official domains)
-            "norton secured", "norton secure", "symantec seal", "symantec secured",
-        ]
-
-        # allowlist domain theo từng loại badge (tối giản để tránh false-positive)
-        expected_domains = {
-            # Vietnam registry
-            "bocongthuong": {"online.gov.vn"},
-            "bo cong thuong": {"online.gov.vn"},
-            "bộ công thương": {"online.gov.vn"},
-            "online.gov.vn": {"online.gov.vn"},
-
-            # DMCA: badge hợp lệ phải link về DMCA certificate/portal
-            "dmca": {"dmca.com"},
-
-            # TRUSTe / TrustArc: validation pages thường nằm trên truste/trustarc domains
-            "truste": {"truste.com", "trustarc.com", "privacy.truste.com", "privacy.trustarc.com"},
-            "trustarc": {"trustarc.com", "truste.com", "privacy.trustarc.com", "privacy.truste.com"},
-            "powered by trustarc": {"trustarc.com", "truste.com", "privacy.trustarc.com", "privacy.truste.com"},
-
-            # BBB: seal hợp lệ link về BBB profile
-            "bbb": {"bbb.org"},
-            "better business bureau": {"bbb.org"},
-            "bbb accredited": {"bbb.org"},
-            "bbb seal": {"bbb.org"},
-
-            # TrustedSite (và legacy McAfee Secure redirect qua TrustedSite)
-            "trustedsite": {"trustedsite.com"},
-            "trusted site": {"trustedsite.com"},
-            "mcafeesecure": {"trustedsite.com", "mcafeesecure.com"},
-            "mcafee secure": {"trustedsite.com", "mcafeesecure.com"},
-
-            # DigiCert / GeoTrust / Thawte site seals (CertCentral / Smart Seal)
-            "digicert": {"digicert.com"},
-            "geotrust": {"geotrust.com", "digicert.com"},
-            "thawte": {"thawte.com", "digicert.com"},
-
-            # Sectigo/Comodo TrustLogo
-            "sectigo": {"sectigo.com", "trustlogo.com"},
-            "comodo": {"sectigo.com", "trustlogo.com", "comodoca.com"},
-            "trustlogo": {"trustlogo.com", "sectigo.com"},
-
-            # GlobalSign
-            "globalsign": {"globalsign.com"},
-        }
+        badge_imgs = page.imgs
 
         base_current_domain = current_domain.split(":")[0]
 
@@ -416,47 +608,34 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
         verified_badges = 0
         detected_badges = 0
 
-        def _text_of_badge(img_tag) -> str:
-            parts = [
-                img_tag.get("alt", ""),
-                img_tag.get("title", ""),
-                img_tag.get("src", ""),
-            ]
-            return " ".join([p for p in parts if p]).lower()
-
-        def _matches_any(text: str) -> bool:
-            return any(k in text for k in badge_keywords)
-
         for img in badge_imgs:
-            t = _text_of_badge(img)
-            if not t or not _matches_any(t):
+            # alt/title/src không rỗng, nối rồi lower() đúng một lần
+            t = " ".join(filter(None, (img.get("alt"), img.get("title"), img.get("src")))).lower()
+            if not t:
+                continue
+            is_badge, badge_type = _match_badge(t)
+            if not is_badge:
                 continue
 
             detected_badges += 1
 
             # tìm <a href=...> gần nhất bao quanh badge
-            a_parent = img.find_parent("a", href=True)
-            if not a_parent:
+            href = page.badge_href(img)
+            if href is None:
                 suspicious_badges += 1
                 continue
 
-            href = (a_parent.get("href") or "").strip()
+            href = href.strip()
             if not href or href == "#":
                 suspicious_badges += 1
                 continue
 
             full_href = urljoin(full_url, href)
-            href_domain = urlparse(full_href).netloc.lower().split(":")[0]
-
-            # xác định "loại" badge để so expected domain
-            badge_type = None
-            for k in expected_domains.keys():
-                if k in t:
-                    badge_type = k
-                    break
+            href_domain = _urlparse_cached(full_href).netloc.lower().split(":")[0]
 
+            # "loại" badge (đã xác định trong _match_badge) để so expected domain
             if badge_type:
-                if not any(href_domain.endswith(ed) for ed in expected_domains[badge_type]):
+                if not href_domain.endswith(_BADGE_EXPECTED_DOMAINS[badge_type]):
                     suspicious_badges += 1
                 else:
                     verified_badges += 1
@@ -465,38 +644,35 @@ def check_html_heuristics(html_content: str, full_url: str) -> Dict[str, Any]:
                 if href_domain == base_current_domain:
                     suspicious_badges += 1
 
-        report["metrics"]["trust_badges_detected"] = detected_badges
-        report["metrics"]["trust_badges_verified"] = verified_badges
-        report["metrics"]["trust_badges_suspicious"] = suspicious_badges
+        report.metrics.trust_badges_detected = detected_badges
+        report.metrics.trust_badges_verified = verified_badges
+        report.metrics.trust_badges_suspicious = suspicious_badges
 
         if suspicious_badges > 0:
-            report["warnings"].append(
+            report.warnings.append(
                 f"Trust badge/seal detected but not verifiable or suspicious ({suspicious_badges}/{detected_badges})."
             )
-            report["sub_score"] -= HTML_SCORES["SUSPICIOUS_TRUST_BADGE"]
+            report.sub_score -= HTML_SCORES["SUSPICIOUS_TRUST_BADGE"]
 
         # ---------------------------------------------------------------------
         # Finalize - Convert to list format for GUI
         # ---------------------------------------------------------------------
-        if report["warnings"]:
-            report["details"] = [f"<b>WARNING:</b> {warning}" for warning in report["warnings"]]
+        if report.warnings:
+            report.details = [f"<b>WARNING:</b> {warning}" for warning in report.warnings]
         else:
-            report["details"] = ["<b>Status:</b> HTML content appears normal (No obvious suspicious patterns)."]
+            report.details = ["<b>Status:</b> HTML content appears normal (No obvious suspicious patterns)."]
 
         # Clamp score to [0.0, 1.0]
-        report["sub_score"] = max(0.0, min(1.0, report["sub_score"]))
+        report.sub_score = max(0.0, min(1.0, report.sub_score))
 
         # Debug: final score and warnings
-        try:
-            print(f"[DEBUG] Final HTML sub_score={report['sub_score']:.2f}, warnings_count={len(report.get('warnings', []))}")
-        except Exception:
-            print(f"[DEBUG] Final HTML sub_score (raw)={report.get('sub_score')}")
+        logger.debug("Final HTML sub_score=%.2f warnings_count=%s", report.sub_score, len(report.warnings))
 
     except Exception as e:
         # Nếu parser/logic lỗi → không kết luận mạnh tay
-        report["details"] = [f"<b>ERROR:</b> HTML analysis error: {str(e)}"]
+        report.details = [f"<b>ERROR:</b> HTML analysis error: {str(e)}"]
         # Giữ sub_score gần trung tính
-        report["sub_score"] = max(0.0, min(1.0, 0.6))
+        report.sub_score = max(0.0, min(1.0, 0.6))
 
     return report
 
@@ -527,4 +703,4 @@ if __name__ == "__main__":
     """
     res = check_html_heuristics(mock_html, "https://legit-bank.com")
     import json
-    print(json.dumps(res, indent=2))
+    print(json.dumps(res.asdict(), indent=2))
@@ -1,22 +1,26 @@
-# Biến này sẽ lưu trữ tất cả các hàm đã "đăng ký lắng nghe"
-_subscribers = []
+import threading
+
+# Biến này sẽ lưu trữ tất cả các hàm đã "đăng ký lắng nghe".
+# Tuple bất biến, copy-on-write: register() tạo tuple mới dưới lock,
+# trigger() duyệt snapshot hiện tại mà không cần lock.
+_subscribers: tuple = ()
+_register_lock = threading.Lock()
 
 def register(callback_function):
     """
     Hàm này cho phép các module khác đăng ký một hàm để nhận tín hiệu.
     'callback_function' là hàm sẽ được gọi khi có link mới.
     """
+    global _subscribers
     if callable(callback_function):
-        _subscribers.append(callback_function)
+        with _register_lock:
+            _subscribers = _subscribers + (callback_function,)
 
 def trigger(url):
     """
     Hàm này được gọi bởi "người phát tín hiệu" (ví dụ: server).
     Nó sẽ lặp qua tất cả các hàm đã đăng ký và gọi chúng với URL nhận được.
     """
-    if not _subscribers:
-        return
-    
     for func in _subscribers:
         try:
             func(url)  # Gọi hàm listener với dữ liệu là URL
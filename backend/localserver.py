@@ -1,19 +1,76 @@
 # server.py – Minimal Localhost Bridge
+import queue
+import threading
+from collections import OrderedDict
+
 from flask import Flask, request, jsonify
 
+try:
+    from waitress import create_server as _waitress_server  # Optional: production WSGI server
+    from waitress import wasyncore as _wasyncore
+except ImportError:
+    _waitress_server = None
+
 server = Flask(__name__)
 TOKEN = 'dev-token'  # must match LOCALHOST_TOKEN in your extension
 HOST = '127.0.0.1'
 PORT = 38999
+SERVER_THREADS = 8  # waitress worker threads
 
 link_callback = None 
-analyzed_urls = set()  # Track URLs that have been analyzed
+# Track URLs that have been analyzed (LRU có giới hạn; Flask threaded -> cần lock)
+MAX_TRACKED_URLS = 10000
+analyzed_urls = OrderedDict()
+_analyzed_lock = threading.Lock()
+_http_server = None  # Werkzeug / waitress server created by run(), used by shutdown()
+_server_lock = threading.Lock()
+_shutting_down = False  # shutdown() tới trước khi run() kịp tạo server -> run() không serve nữa
+
+# URL nhận từ extension được xử lý ở worker thread riêng, request trả về ngay
+_work_q = queue.Queue()
+_worker_thread = None
 
 def set_callback(func):
     """Set callback function to be called when URL is received from extension"""
     global link_callback
     link_callback = func
 
+def _worker():
+    """Lấy URL từ hàng đợi và gọi link_callback (None = dừng)"""
+    while True:
+        url = _work_q.get()
+        if url is None:
+            return
+        callback = link_callback
+        if callback is None:
+            continue
+        try:
+            callback(url)
+        except Exception as e:
+            print(f"[LocalServer] Callback error for {url}: {e}")
+
+def _start_worker():
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=_worker, name="localserver-callback", daemon=True)
+        _worker_thread.start()
+
+def _claim_url(url):
+    """Đánh dấu URL đang được phân tích; False nếu URL đã có trong danh sách"""
+    with _analyzed_lock:
+        if url in analyzed_urls:
+            analyzed_urls.move_to_end(url)
+            return False
+        analyzed_urls[url] = None
+        if len(analyzed_urls) > MAX_TRACKED_URLS:
+            analyzed_urls.popitem(last=False)
+        return True
+
+def forget_url(url):
+    """Bỏ URL khỏi danh sách đã phân tích (cửa sổ kết quả đóng -> cho phép quét lại)"""
+    with _analyzed_lock:
+        return analyzed_urls.pop(url, False) is None
+
 @server.get('/health')
 def health():
     return jsonify({'ok': True})
@@ -27,22 +84,22 @@ def download():
     if not url:
         return jsonify({'ok': False, 'error': 'missing url'}), 400
 
-    # Check if URL has already been analyzed
-    if url in analyzed_urls:
+    # Check if URL has already been analyzed (check + mark atomically)
+    if not _claim_url(url):
         print(f"[LocalServer] URL already analyzed: {url}")
         return jsonify({'ok': False, 'error': 'duplicate', 'message': 'You cannot scan the same link twice! Close the analysis window to scan again.'}), 409
     
     print(f"[LocalServer] Received URL from extension: {url}")
-    analyzed_urls.add(url)  # Mark URL as analyzed
     
     if link_callback:
-        link_callback(url)
+        _work_q.put(url)  # worker gọi link_callback, không giữ kết nối của extension
 
     return jsonify({'ok': True, 'url': url, 'message': 'Analysis started'})
 
 def run():
     # Enable threaded mode to handle multiple requests simultaneously
     # Add request timeout and connection handling settings
+    global _http_server
     from werkzeug.serving import make_server
     import logging
     
@@ -51,6 +108,17 @@ def run():
     log.setLevel(logging.ERROR)
     
     print(f"[LocalServer] Starting server on {HOST}:{PORT}")
+    _start_worker()
+
+    if _waitress_server is not None:
+        # waitress: thread pool cố định, timeout theo channel_timeout (không cần settimeout)
+        srv = _waitress_server(server, host=HOST, port=PORT, threads=SERVER_THREADS,
+                               connection_limit=200, channel_timeout=30)
+        if not _publish_server(srv):
+            return
+        print(f"[LocalServer] Server ready (waitress, {SERVER_THREADS} threads) - listening for extension requests")
+        srv.run()
+        return
     
     try:
         # Create server with timeout settings
@@ -65,9 +133,45 @@ def run():
         # Set socket timeout (30 seconds)
         srv.socket.settimeout(30)
         
+        if not _publish_server(srv):
+            return
         print(f"[LocalServer] Server ready - listening for extension requests")
         srv.serve_forever()
     except Exception as e:
         print(f"[LocalServer] Error starting server: {e}")
         # Fallback to simple run
-        server.run(HOST, PORT, debug=False, threaded=True)
\ No newline at end of file
+        server.run(HOST, PORT, debug=False, threaded=True)
+
+def _publish_server(srv):
+    """Ghi nhận server cho shutdown(); False (và đóng srv) nếu shutdown() đã được gọi trước"""
+    global _http_server
+    with _server_lock:
+        if not _shutting_down:
+            _http_server = srv
+            return True
+    print("[LocalServer] Shutdown requested before start - not serving")
+    _close_server(srv)
+    return False
+
+def _close_server(srv):
+    if _waitress_server is not None and not hasattr(srv, "serve_forever"):
+        # waitress: close() chỉ đóng listener, run() vẫn lặp khi còn kết nối mở (tới channel_timeout)
+        # -> dừng worker threads rồi đóng mọi socket trong map để vòng lặp thoát ngay
+        srv.task_dispatcher.shutdown()
+        _wasyncore.close_all(getattr(srv, "_map", None) or getattr(srv, "map", None) or {}, ignore_all=True)
+        return
+    srv.server_close()
+
+def shutdown():
+    """Stop the server started by run() so the calling thread can exit cleanly"""
+    global _http_server, _shutting_down
+    with _server_lock:
+        _shutting_down = True
+        srv, _http_server = _http_server, None
+    _work_q.put(None)  # dừng worker sau các URL đang chờ
+    if srv is None:
+        return
+    print("[LocalServer] Shutting down server")
+    if hasattr(srv, "serve_forever"):
+        srv.shutdown()  # Werkzeug: chờ serve_forever() trả về
+    _close_server(srv)
@@ -3,13 +3,65 @@
 # Analyzes the domain name for common phishing patterns.
 # (Incorporates research: homoglyphs, URL encoding, TLDs)
 
+import re
 import socket
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+try:
+    import ahocorasick  # Optional: pyahocorasick automaton cho các token lexical
+except ImportError:
+    ahocorasick = None
 
 
 # --- HEURISTICS ---
 # Deceptive TLDs are often used for phishing
-DECEPTIVE_TLDS = {'.xyz', '.info', '.top', '.icu', '.site', '.online', '.link'}
+DECEPTIVE_TLDS = frozenset({'.xyz', '.info', '.top', '.icu', '.site', '.online', '.link'})
+
+# Ký tự duy nhất có thể xuất hiện trong một IPv4 mà socket.inet_aton chấp nhận
+_INET_ATON_CHARS = "0123456789abcdefABCDEFxX."
+
+# URL shortening services (khớp chính xác domain đăng ký = 2 nhãn cuối của hostname)
+SHORTENERS = frozenset({"bit.ly", "goo.gl", "tinyurl.com", "t.co", "is.gd", "cli.gs", "yfrog.com", "migre.me", "ff.im"})
+
+# Nhãn > 15 ký tự mà sau nó còn ít nhất 2 nhãn (tức nằm trong hostname.split('.')[:-2]);
+# quét ở C-level, không dựng list nhãn
+_LONG_SUBDOMAIN_RE = re.compile(r"[^.]{16,}\.[^.]*\.")
+
+# Một regex cho mọi token lexical; lastindex cho biết nhóm nào khớp.
+# ('https' chứa 'http'; bỏ '.com' không đổi việc có chữ số 0/1 hay không)
+_TOK_HTTP, _TOK_AT, _TOK_PCT, _TOK_DIGIT = range(1, 5)
+_TOKENS = (("http", _TOK_HTTP), ("@", _TOK_AT), ("%", _TOK_PCT), ("0", _TOK_DIGIT), ("1", _TOK_DIGIT))
+
+if ahocorasick is not None:
+    # Automaton: quét hostname đúng một lượt O(n), payload = id nhóm token
+    _TOKEN_AC = ahocorasick.Automaton()
+    for _tok, _tag in _TOKENS:
+        _TOKEN_AC.add_word(_tok, _tag)
+    _TOKEN_AC.make_automaton()
+    _TOKEN_RE = None
+else:
+    # Fallback: regex alternation, lastindex = id nhóm token
+    _TOKEN_AC = None
+    _TOKEN_RE = re.compile(r"(http)|(@)|(%)|([01])")
+
+
+def _scan_tokens(hostname: str) -> set:
+    """Các nhóm token có mặt trong hostname (dừng sớm khi đủ cả 4)"""
+    fired = set()
+    if _TOKEN_AC is not None:
+        for _, tag in _TOKEN_AC.iter(hostname):
+            fired.add(tag)
+            if len(fired) == 4:
+                break
+    else:
+        for m in _TOKEN_RE.finditer(hostname):
+            fired.add(m.lastindex)
+            if len(fired) == 4:
+                break
+    return fired
 
 
 # --- Domain Pattern Penalties (these are subtractions from 1.0) ---
@@ -54,19 +106,28 @@ def calculate_subdomain_length_penalty(max_subdomain_length: int) -> float:
     Returns:
         float: Penalty value to subtract from base score
     """
-    if max_subdomain_length <= 15:
+    # Bảng tra 64 phần tử: mọi độ dài >= 41 đều là 0.4 nên kẹp chỉ số về [0, 63]
+    return _SUBDOMAIN_LUT[min(max(max_subdomain_length, 0), 63)]
+
+
+def _subdomain_length_penalty(length: int) -> float:
+    """Công thức gốc, chỉ dùng để dựng _SUBDOMAIN_LUT"""
+    if length <= 15:
         return 0.0
-    elif max_subdomain_length <= 25:
+    elif length <= 25:
         # Linear interpolation: 16-25 chars → 0.0-0.15
-        return ((max_subdomain_length - 15) / 10) * 0.15
-    elif max_subdomain_length <= 40:
+        return ((length - 15) / 10) * 0.15
+    elif length <= 40:
         # Linear interpolation: 26-40 chars → 0.15-0.3
-        return 0.15 + ((max_subdomain_length - 25) / 15) * 0.15
+        return 0.15 + ((length - 25) / 15) * 0.15
     else:
         # 40+ chars - very suspicious
         return 0.4
 
 
+_SUBDOMAIN_LUT = tuple(_subdomain_length_penalty(i) for i in range(64))
+
+
 def check_domain_pattern(hostname: str) -> Dict[str, Any]:
     """
     Analyzes the domain name for common phishing patterns.
@@ -91,91 +152,118 @@ def check_domain_pattern(hostname: str) -> Dict[str, Any]:
     #     ]
     # }
     """
-    report = {
-        "sub_score": 1.0,  # Start with a perfect score
-        "details": "Domain pattern appears normal.",
-        "warnings": []
+    sub_score, warnings = _check_domain_pattern_cached(hostname)
+
+    # Finalizing Report - Convert to list format for GUI
+    if warnings:
+        details = [f"<b>WARNING:</b> {warning}" for warning in warnings]
+    else:
+        details = ["<b>Status:</b> Domain pattern appears normal (No obvious lexical anomalies)."]
+
+    return {
+        "sub_score": sub_score,
+        "details": details,
+        "warnings": list(warnings),
     }
 
+
+def check_domain_patterns(hostnames: Iterable[str]) -> np.ndarray:
+    """
+    Batch version of check_domain_pattern for bulk scans: returns only the sub_scores
+    (float64 array, same order as hostnames). Each distinct hostname is analysed once.
+    """
+    # Hostname lặp lại (nhiều URL cùng domain) -> map về chỉ số duy nhất, tính mỗi domain một lần
+    index: Dict[str, int] = {}
+    inverse = np.fromiter((index.setdefault(h, len(index)) for h in hostnames), dtype=np.intp)
+    scores = np.fromiter((_check_domain_pattern_cached(h)[0] for h in index), dtype=np.float64, count=len(index))
+    return scores[inverse]
+
+
+@lru_cache(maxsize=4096)
+def _check_domain_pattern_cached(hostname: str) -> Tuple[float, Tuple[str, ...]]:
+    """Các heuristic thuần theo hostname → (sub_score, warnings); kết quả bất biến nên cache được"""
+    sub_score = 1.0  # Start with a perfect score
+    warnings = []
+
     # 1. Check for IP address as hostname
     # Ref: Section VII.A.1 - "obfuscation techniques... replace hostnames with IP addresses"
-    try:
-        socket.inet_aton(hostname)
-        report["warnings"].append("Hostname is an IP address (Obfuscation technique).")
-        report["sub_score"] -= 0.3
-    except socket.error:
-        pass
-
-        # 2. Check for excessive hyphens
+    # Tiền lọc: inet_aton chỉ nhận chữ số dec/oct/hex và '.', nên hostname chữ thường bị loại
+    # ngay ở C-level, không phải dựng exception. Vẫn dùng inet_aton để bắt cả IP dạng
+    # rút gọn/hex/thập phân (127.1, 0x7f000001, 2130706433) chứ không chỉ a.b.c.d.
+    if not hostname.strip(_INET_ATON_CHARS):
+        try:
+            socket.inet_aton(hostname)
+            warnings.append("Hostname is an IP address (Obfuscation technique).")
+            sub_score -= 0.3
+        except OSError:
+            pass
+
+    # Một lượt quét: các nhóm token nào có mặt trong hostname
+    fired = _scan_tokens(hostname)
+
+    # 2. Check for excessive hyphens
     # Ref: Section VII.A.1.a - Lexical properties (delimiters, structure)
     if hostname.count('-') > 2:
-        report["warnings"].append("Excessive hyphens in domain (often used to hide brand names).")
-        report["sub_score"] -= 0.2
+        warnings.append("Excessive hyphens in domain (often used to hide brand names).")
+        sub_score -= 0.2
 
     # 3. Check for deceptive TLDs
     # Ref: Section II (Anatomy of Phishing) - "register specific domains"
-    tld = "." + hostname.split('.')[-1]
+    tld = "." + hostname.rpartition('.')[2]
     if tld in DECEPTIVE_TLDS:
-        report["warnings"].append(f"Uses a deceptive TLD often associated with phishing: {tld}")
-        report["sub_score"] -= 0.3
+        warnings.append(f"Uses a deceptive TLD often associated with phishing: {tld}")
+        sub_score -= 0.3
 
     # 4. Check for long subdomains / URL length
     # Ref: Section VII.A.1 - "URL and domain lengths... are particularly relevant"
     # Phishers often use long URLs to hide the actual domain in mobile browsers.
     if len(hostname) > 30:
-        report["warnings"].append("Hostname is suspiciously long (>30 chars).")
-        report["sub_score"] -= 0.2
+        warnings.append("Hostname is suspiciously long (>30 chars).")
+        sub_score -= 0.2
 
-    parts = hostname.split('.')
-    if len(parts) > 3:
-        if any(len(part) > 15 for part in parts[:-2]):
-            report["warnings"].append("Contains unusually long subdomains.")
-            report["sub_score"] -= 0.2
+    if hostname.count('.') > 2:
+        if _LONG_SUBDOMAIN_RE.search(hostname):
+            warnings.append("Contains unusually long subdomains.")
+            sub_score -= 0.2
 
     # 5. Check for URL encoding in hostname
     # Ref: Section VII.A.1.a - "URL orthographic patterns"
-    if '%' in hostname:
-        report["warnings"].append("Hostname contains URL-encoded characters (Obfuscation).")
-        report["sub_score"] -= 0.4
+    if _TOK_PCT in fired:
+        warnings.append("Hostname contains URL-encoded characters (Obfuscation).")
+        sub_score -= 0.4
 
     # 6. Check for homoglyphs/typosquatting (Simple check)
     # Ref: Section II - "typosquatting... replace English characters with identical looking characters"
     # e.g., paypa1.com, g00gle.com
-    if '0' in hostname.replace('.com', '') or '1' in hostname.replace('.com', ''):
-        report["warnings"].append("Hostname contains numbers '0' or '1' (potential typosquatting of 'o'/'l').")
-        report["sub_score"] -= 0.2
+    if _TOK_DIGIT in fired:
+        warnings.append("Hostname contains numbers '0' or '1' (potential typosquatting of 'o'/'l').")
+        sub_score -= 0.2
 
     # 7. Check for 'https' or 'http' token in domain
     # Ref: Section VII.A.1.a - Lexical properties
     # Phishers add "https" to the subdomain to trick users (e.g., https-secure-verify.com)
-    if "http" in hostname or "https" in hostname:
-        report["warnings"].append("Hostname contains 'http'/'https' token (Deceptive technique).")
-        report["sub_score"] -= 0.4
+    if _TOK_HTTP in fired:
+        warnings.append("Hostname contains 'http'/'https' token (Deceptive technique).")
+        sub_score -= 0.4
 
     # 8. Check for '@' symbol in URL (Authority part)
     # Ref: Section VII.A.1.a - "unnecessary punctuation marks"
     # Browsers ignore everything before '@', sending user to the site after it.
-    if "@" in hostname:
-        report["warnings"].append("Hostname contains '@' symbol (Redirect obfuscation).")
-        report["sub_score"] -= 0.5
+    if _TOK_AT in fired:
+        warnings.append("Hostname contains '@' symbol (Redirect obfuscation).")
+        sub_score -= 0.5
 
     # 9. Check for URL Shortening Services (Heuristic)
     # Ref: Section IX (Conclusion) - "An important research gap refers to... URL shortening services"
     # Shorteners mask the real phishing URL.
-    shorteners = ["bit.ly", "goo.gl", "tinyurl.com", "t.co", "is.gd", "cli.gs", "yfrog.com", "migre.me", "ff.im"]
-    if any(s in hostname for s in shorteners):
-        report["warnings"].append("Uses a URL shortening service (Masks destination).")
+    # So khớp domain đăng ký trong set: O(1) và không còn dương tính giả kiểu 'rabbit.ly'
+    registrable = '.'.join(hostname.rsplit('.', 2)[-2:])
+    if registrable in SHORTENERS:
+        warnings.append("Uses a URL shortening service (Masks destination).")
         # Note: Shorteners aren't inherently malicious, but suspicious in this context.
-        report["sub_score"] -= 0.1
-
-    # Finalizing Report - Convert to list format for GUI
-    if report["warnings"]:
-        report["details"] = [f"<b>WARNING:</b> {warning}" for warning in report["warnings"]]
-    else:
-        report["details"] = ["<b>Status:</b> Domain pattern appears normal (No obvious lexical anomalies)."]
+        sub_score -= 0.1
 
-    report["sub_score"] = max(0.0, report["sub_score"])
-    return report
+    return max(0.0, sub_score), tuple(warnings)
 
 
 if __name__ == "__main__":
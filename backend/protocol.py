@@ -7,19 +7,21 @@
 # 1. "A State-of-the-Art Review..." (Li et al., 2024) - Section IV.A.2: Traffic properties.
 # 2. "Phishing or Not Phishing?..." (Zieni et al., 2023) - Section VII.A.2.c: Traffic properties.
 
+import asyncio
 import ssl
 import socket
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List
 
 
-def check_protocol_security(hostname: str, timeout: int = 5) -> Dict[str, Any]:
-    """
-    Checks for HTTPS availability and TLS version security.
+# Tạo context một lần cho cả process (load + parse CA bundle tốn kém), dùng chung sync/async
+_SSL_CTX = ssl.create_default_context()
 
-    Returns:
-    Dict[str, Any]: A report dictionary with protocol security assessment.
-    """
-    report = {
+# TLS cũ / không an toàn (Ref: Zieni et al., 2023)
+_INSECURE_TLS = ("SSLv3", "TLSv1", "TLSv1.1")
+
+
+def _new_report() -> Dict[str, Any]:
+    return {
         "sub_score": 0.0,
         "details": "N/A",
         "protocol": "N/A",
@@ -27,78 +29,141 @@ def check_protocol_security(hostname: str, timeout: int = 5) -> Dict[str, Any]:
         "is_secure": False
     }
 
-    try:
-        # Try HTTPS connection
-        context = ssl.create_default_context()
-        with socket.create_connection((hostname, 443), timeout=timeout) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                report["protocol"] = "HTTPS"
-                report["is_secure"] = True
 
-                # Get TLS version (Ref: Zieni et al., 2023)
-                tls_version = ssock.version()
-                report["tls_version"] = tls_version
-
-                # Score based on TLS version
-                if tls_version in ["SSLv3", "TLSv1", "TLSv1.1"]:
-                    # Insecure/deprecated TLS versions
-                    report["details"] = [f"<b>Status:</b> HTTPS connection with INSECURE TLS version ({tls_version})."]
-                    report["sub_score"] = 0.2
-                    report["is_secure"] = False
-                elif tls_version == "TLSv1.2":
-                    # Acceptable but not optimal
-                    report["details"] = [f"<b>Status:</b> HTTPS connection with acceptable TLS version ({tls_version})."]
-                    report["sub_score"] = 0.9
-                elif tls_version == "TLSv1.3":
-                    # Modern and secure
-                    report["details"] = [f"<b>Status:</b> HTTPS connection with modern TLS version ({tls_version})."]
-                    report["sub_score"] = 1.0
-                else:
-                    # Unknown TLS version - assume acceptable
-                    report["details"] = [f"<b>Status:</b> HTTPS connection with TLS version ({tls_version})."]
-                    report["sub_score"] = 0.8
-
-    except ssl.SSLCertVerificationError:
+def _apply_tls_version(report: Dict[str, Any], tls_version: str) -> None:
+    """HTTPS handshake thành công: chấm điểm theo phiên bản TLS"""
+    report["protocol"] = "HTTPS"
+    report["is_secure"] = True
+    report["tls_version"] = tls_version
+
+    # Score based on TLS version
+    if tls_version in _INSECURE_TLS:
+        # Insecure/deprecated TLS versions
+        report["details"] = [f"<b>Status:</b> HTTPS connection with INSECURE TLS version ({tls_version})."]
+        report["sub_score"] = 0.2
+        report["is_secure"] = False
+    elif tls_version == "TLSv1.2":
+        # Acceptable but not optimal
+        report["details"] = [f"<b>Status:</b> HTTPS connection with acceptable TLS version ({tls_version})."]
+        report["sub_score"] = 0.9
+    elif tls_version == "TLSv1.3":
+        # Modern and secure
+        report["details"] = [f"<b>Status:</b> HTTPS connection with modern TLS version ({tls_version})."]
+        report["sub_score"] = 1.0
+    else:
+        # Unknown TLS version - assume acceptable
+        report["details"] = [f"<b>Status:</b> HTTPS connection with TLS version ({tls_version})."]
+        report["sub_score"] = 0.8
+
+
+def _apply_ssl_error(report: Dict[str, Any], e: ssl.SSLError) -> None:
+    report["protocol"] = "HTTPS"
+    if isinstance(e, ssl.SSLCertVerificationError):
         # Certificate verification failed, but HTTPS is attempted
-        report["protocol"] = "HTTPS"
         report["details"] = ["<b>WARNING:</b> HTTPS available but certificate verification failed."]
         report["sub_score"] = 0.4
-
-    except ssl.SSLError:
+    else:
         # SSL protocol error
-        report["protocol"] = "HTTPS"
         report["details"] = ["<b>ERROR:</b> HTTPS available but SSL protocol error occurred."]
         report["sub_score"] = 0.3
 
-    except socket.timeout:
-        # Connection timeout on port 443 - try HTTP
+
+def _apply_http_fallback(report: Dict[str, Any], http_ok: bool) -> None:
+    if http_ok:
+        report["protocol"] = "HTTP"
+        report["details"] = ["<b>Status:</b> Only insecure HTTP connection available (No SSL/TLS)."]
+        report["sub_score"] = 0.0  # HTTP only = 0 points
+        report["is_secure"] = False
+    else:
+        # Neither HTTPS nor HTTP available
+        report["details"] = ["<b>ERROR:</b> Connection failed - website is unreachable."]
+        report["sub_score"] = 0.0
+        report["transient"] = True  # Lỗi mạng, lần quét sau nên thử lại
+
+
+def check_protocol_security(hostname: str, timeout: int = 5) -> Dict[str, Any]:
+    """
+    Checks for HTTPS availability and TLS version security.
+
+    Returns:
+    Dict[str, Any]: A report dictionary with protocol security assessment.
+    """
+    report = _new_report()
+
+    try:
+        # Try HTTPS connection
+        with socket.create_connection((hostname, 443), timeout=timeout) as sock:
+            with _SSL_CTX.wrap_socket(sock, server_hostname=hostname) as ssock:
+                # Get TLS version (Ref: Zieni et al., 2023)
+                _apply_tls_version(report, ssock.version())
+
+    except ssl.SSLError as e:
+        _apply_ssl_error(report, e)
+
+    except Exception:
+        # HTTPS not available / timeout on port 443 - try HTTP
         try:
             with socket.create_connection((hostname, 80), timeout=timeout):
-                report["protocol"] = "HTTP"
-                report["details"] = ["<b>Status:</b> Only insecure HTTP connection available (No SSL/TLS)."]
-                report["sub_score"] = 0.0  # HTTP only = 0 points
-                report["is_secure"] = False
-        except:
-            # Neither HTTPS nor HTTP available
-            report["details"] = ["<b>ERROR:</b> Connection failed - website is unreachable."]
-            report["sub_score"] = 0.0
+                http_ok = True
+        except Exception:
+            http_ok = False
+        _apply_http_fallback(report, http_ok)
+
+    return report
+
+
+async def _close(writer) -> None:
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except Exception:
+        pass
+
+
+async def check_protocol_security_async(hostname: str, timeout: int = 5) -> Dict[str, Any]:
+    """
+    Async version of check_protocol_security (same report format).
+    TCP + TLS handshake chạy trên event loop, nên nhiều hostname có thể kiểm tra song song.
+    """
+    report = _new_report()
+
+    try:
+        # Try HTTPS connection
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(hostname, 443, ssl=_SSL_CTX, server_hostname=hostname),
+            timeout,
+        )
+        try:
+            _apply_tls_version(report, writer.get_extra_info("ssl_object").version())
+        finally:
+            await _close(writer)
+
+    except ssl.SSLError as e:
+        _apply_ssl_error(report, e)
 
     except Exception:
-        # HTTPS not available, try HTTP
+        # HTTPS not available / timeout on port 443 - try HTTP
         try:
-            with socket.create_connection((hostname, 80), timeout=timeout):
-                report["protocol"] = "HTTP"
-                report["details"] = ["<b>Status:</b> Only insecure HTTP connection available (No SSL/TLS)."]
-                report["sub_score"] = 0.0  # HTTP only = 0 points
-                report["is_secure"] = False
-        except:
-            # Neither HTTPS nor HTTP available
-            report["details"] = ["<b>ERROR:</b> Connection failed - website is unreachable."]
-            report["sub_score"] = 0.0
+            _, writer = await asyncio.wait_for(asyncio.open_connection(hostname, 80), timeout)
+            await _close(writer)
+            http_ok = True
+        except Exception:
+            http_ok = False
+        _apply_http_fallback(report, http_ok)
 
     return report
 
 
+async def check_protocols(hostnames: Iterable[str], timeout: int = 5) -> List[Dict[str, Any]]:
+    """
+    Check many hostnames concurrently; wall time ~ slowest host instead of the sum.
+    Results keep the input order.
+
+    From sync code: asyncio.run(check_protocols(hostnames))
+    """
+    return await asyncio.gather(*[check_protocol_security_async(h, timeout) for h in hostnames])
+
+
 if __name__ == "__main__":
     """
     Main block for testing this module independently.
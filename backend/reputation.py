@@ -3,6 +3,7 @@
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 import concurrent.futures
 from typing import Dict, Any
 import os
@@ -41,6 +42,17 @@ REPUTATION_SCORES = {
 }
 
 
+def _make_session() -> requests.Session:
+    """Shared keep-alive session so VT / GSB lookups reuse warm TLS connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+    session.mount("https://", adapter)
+    return session
+
+
+_SESSION = _make_session()
+
+
 def calculate_reputation_score(malicious_count: int, suspicious_count: int, total_vendors: int = 90) -> float:
     """
     Calculate reputation score based on vendor flagging counts.
@@ -75,7 +87,8 @@ def _check_virustotal(hostname: str) -> Dict[str, Any]:
     """
     Internal function to check VirusTotal. Returns a standard dict.
     """
-    report = {"source": "VirusTotal", "sub_score": REPUTATION_SCORES["DEFAULT_NEUTRAL"], "details": "N/A"}
+    report = {"source": "VirusTotal", "sub_score": REPUTATION_SCORES["DEFAULT_NEUTRAL"], "details": "N/A",
+              "malicious": 0, "suspicious": 0}
 
     if not VIRUSTOTAL_API_KEY or VIRUSTOTAL_API_KEY == "YOUR_API_KEY_HERE":
         report["details"] = "VT API key not configured."
@@ -85,12 +98,14 @@ def _check_virustotal(hostname: str) -> Dict[str, Any]:
     url = VIRUSTOTAL_API_URL.format(domain=hostname)
 
     try:
-        response = requests.get(url, headers=headers, timeout=10, verify=False)
+        response = _SESSION.get(url, headers=headers, timeout=10, verify=False)
 
         if response.status_code == 200:
             stats = response.json().get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
             malicious = stats.get("malicious", 0)
             suspicious = stats.get("suspicious", 0)
+            report["malicious"] = malicious
+            report["suspicious"] = suspicious
 
             if malicious > 0:
                 report["details"] = f"Flagged as MALICIOUS by {malicious} vendors."
@@ -108,10 +123,12 @@ def _check_virustotal(hostname: str) -> Dict[str, Any]:
         else:
             report["details"] = f"API Error (Status {response.status_code})"
             report["sub_score"] = REPUTATION_SCORES["API_ERROR"]  # Neutral on API error
+            report["transient"] = True
 
     except requests.exceptions.RequestException:
         report["details"] = "Connection error."
         report["sub_score"] = REPUTATION_SCORES["CONNECTION_ERROR"]
+        report["transient"] = True
 
     return report
 
@@ -137,7 +154,7 @@ def _check_google_safebrowsing(full_url: str) -> Dict[str, Any]:
     }
 
     try:
-        response = requests.post(GOOGLE_SAFE_BROWSING_API_URL, json=payload, timeout=10, verify=False)
+        response = _SESSION.post(GOOGLE_SAFE_BROWSING_API_URL, json=payload, timeout=10, verify=False)
 
         if response.status_code == 200:
             data = response.json()
@@ -151,10 +168,12 @@ def _check_google_safebrowsing(full_url: str) -> Dict[str, Any]:
         else:
             report["details"] = f"API Error (Status {response.status_code})"
             report["sub_score"] = REPUTATION_SCORES["API_ERROR"]  # Neutral on API error
+            report["transient"] = True
 
     except requests.exceptions.RequestException:
         report["details"] = "Connection error."
         report["sub_score"] = REPUTATION_SCORES["CONNECTION_ERROR"]
+        report["transient"] = True
 
     return report
 
@@ -206,26 +225,9 @@ def check_reputation(hostname: str, full_url: str) -> Dict[str, Any]:
         report["details"].append("<b>NO-DATA:</b> Both reputation APIs unavailable - module excluded from score")
         return report
 
-    # Extract vendor counts from VirusTotal
-    malicious_count = 0
-    suspicious_count = 0
-    
-    if "MALICIOUS by" in vt_report["details"]:
-        try:
-            # Extract number from "Flagged as MALICIOUS by X vendors."
-            parts = vt_report["details"].split("by")
-            if len(parts) > 1:
-                malicious_count = int(parts[1].split()[0])
-        except:
-            pass
-    
-    if "SUSPICIOUS by" in vt_report["details"]:
-        try:
-            parts = vt_report["details"].split("by")
-            if len(parts) > 1:
-                suspicious_count = int(parts[1].split()[0])
-        except:
-            pass
+    # Vendor counts from VirusTotal (suspicious only counts when nothing flagged malicious)
+    malicious_count = vt_report["malicious"]
+    suspicious_count = 0 if malicious_count else vt_report["suspicious"]
 
     # Calculate total flags
     total_flags = malicious_count + suspicious_count
@@ -257,6 +259,8 @@ def check_reputation(hostname: str, full_url: str) -> Dict[str, Any]:
         report["details"].append("<b>Verdict:</b> Partial data available")
     
     report["sub_score"] = final_score
+    # Một nguồn lỗi tạm thời -> kết quả chưa đầy đủ, không cache (lần quét sau gọi lại API)
+    report["transient"] = bool(vt_report.get("transient") or gsb_report.get("transient"))
 
     return report
 
@@ -3,18 +3,29 @@
 import firebase_admin
 from firebase_admin import credentials
 from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists
 import base64
 import time
+from functools import lru_cache
 
 # --- Các hàm hỗ trợ ---
-CURRENT_REVIEW = []
+_DB = None
 
+def _db():
+    """Firestore client dùng chung cho module (khởi tạo lười ở lần gọi đầu)"""
+    global _DB
+    if _DB is None:
+        _DB = firestore.client()
+    return _DB
+
+@lru_cache(maxsize=2048)
 def encode_url_key(url):
     """
     Mã hóa URL để làm Document ID an toàn.
     Firestore ID không được chứa dấu '/'
     """
-    return base64.urlsafe_b64encode(url.encode()).decode().strip('=')
+    # Bỏ padding trên bytes rồi mới decode: chỉ dựng một str kết quả
+    return base64.urlsafe_b64encode(url.encode()).rstrip(b'=').decode('ascii')
 
 def has_user_reviewed(uid, url):
     """
@@ -22,7 +33,7 @@ def has_user_reviewed(uid, url):
     Returns True if user has reviewed, False otherwise.
     """
     try:
-        db = firestore.client()
+        db = _db()
         safe_url_id = encode_url_key(url)
         
         # Query for reviews by this user for this URL
@@ -39,17 +50,14 @@ def has_user_reviewed(uid, url):
 
 def save_review(uid, url, review_data):
     try:
-        db = firestore.client()
-        
-        # Check if user has already reviewed
-        if has_user_reviewed(uid, url):
-            print(f"[ERROR] User {uid} has already reviewed {url}")
-            return False
+        db = _db()
         
         # 1. Chuẩn bị ID và Key
         safe_url_id = encode_url_key(url)
         timestamp = int(time.time() * 1000)
-        review_id = f"{timestamp}_{uid}" # ID theo format bạn yêu cầu
+        # ID cố định theo uid trong sub-collection của URL -> mỗi user một review / URL,
+        # create() kiểm tra + ghi nguyên tử trong một round trip (không cần has_user_reviewed)
+        review_id = uid
         
         # 2. Bổ sung thông tin vào data (nên lưu lại uid và timestamp trong data để dễ query)
         review_data['uid'] = uid
@@ -61,10 +69,13 @@ def save_review(uid, url, review_data):
         doc_ref = db.collection('reviews').document(safe_url_id)\
                     .collection('list_reviews').document(review_id)
         
-        # 4. Lưu dữ liệu (.set sẽ ghi đè nếu ID đã tồn tại, hoặc tạo mới nếu chưa)
-        doc_ref.set(review_data)
+        # 4. Lưu dữ liệu (.create báo AlreadyExists nếu user đã review URL này)
+        doc_ref.create(review_data)
         return True
-        
+
+    except AlreadyExists:
+        print(f"[ERROR] User {uid} has already reviewed {url}")
+        return False
     except Exception as e:
         print(f"[ERROR] Error saving review: {e}")
         return False   
@@ -75,7 +86,7 @@ def delete_review(uid, url, review_id):
     Only the user who created the review can delete it.
     """
     try:
-        db = firestore.client()
+        db = _db()
         safe_url_id = encode_url_key(url)
         
         # Verify the review belongs to this user before deleting
@@ -102,7 +113,7 @@ def delete_review(uid, url, review_id):
 
 def get_reviews(url):
     try:
-        db = firestore.client()
+        db = _db()
         
         # 1. Mã hóa URL để tìm đúng Document cha
         safe_url_id = encode_url_key(url) # Hàm encode đã viết ở bước trước
@@ -111,15 +122,8 @@ def get_reviews(url):
         reviews_ref = db.collection('reviews').document(safe_url_id).collection('list_reviews')
         
         # 3. Lấy dữ liệu (stream() tốt hơn get() cho dữ liệu lớn)
-        docs = reviews_ref.stream()
-        
-        all_reviews = []
-        CURRENT_REVIEW.clear()
-        for doc in docs:
-            review_data = doc.to_dict()
-            all_reviews.append(review_data)
-            CURRENT_REVIEW.append(review_data)
-        return all_reviews
+        # (ID không còn mang timestamp nên sắp xếp tường minh theo thời gian đăng)
+        return [doc.to_dict() for doc in reviews_ref.order_by('timestamp').stream()]
 
     except Exception as e:
         print(f"[ERROR] Error getting reviews: {e}")
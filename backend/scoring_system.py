@@ -20,10 +20,12 @@ RETRY MECHANISM:
 import concurrent.futures
 import os
 import time
+from datetime import date
+import numpy as np
 import requests
 import urllib3
 from urllib.parse import urlparse
-from .config                            import SCORE_WEIGHTS
+from .config                            import SCORE_KEYS, SCORE_WEIGHTS_VEC
 
 # Disable SSL warnings when verify=False is used (for sites with self-signed certificates)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -144,6 +146,9 @@ def get_results(url: str, timeout: int = 30, retry_count: int = 3, screenshot_en
     # Generate screenshot filename from URL (prepare early)
     screenshot_url = url if url.startswith(('http://', 'https://')) else f'https://{url}'
     hostname = urlparse(screenshot_url).netloc or urlparse(url).netloc or "unknown"
+    # Parse hostname một lần, dùng chung cho các check theo hostname (SSL, protocol, reputation, pattern)
+    check_hostname = urlparse(screenshot_url).hostname
+    today_ordinal = date.today().toordinal()
     screenshot_filename = f"screenshot_{hostname.replace('.', '_')}.png"
     screenshot_path = os.path.join("screenshots", screenshot_filename)
     
@@ -171,9 +176,10 @@ def get_results(url: str, timeout: int = 30, retry_count: int = 3, screenshot_en
         web_info = None
     
     try:
-        review_future.result(timeout=timeout)  # Just trigger, result stored in review.CURRENT_REVIEW
+        list_of_review = review_future.result(timeout=timeout)
     except Exception as e:
         print(f"[ERROR] Failed to fetch reviews: {e}")
+        list_of_review = []
     
     data_executor.shutdown(wait=False)
     
@@ -213,12 +219,12 @@ def get_results(url: str, timeout: int = 30, retry_count: int = 3, screenshot_en
     # Wrap each task with retry logic
     tasks = {
         'Certificate details': lambda: execute_with_retry(
-            lambda: calculate_score.certificate_score(url=url), 
+            lambda: calculate_score.certificate_score(url=url, hostname=check_hostname), 
             max_retries=retry_count, 
             module_name='Certificate details'
         ),
         'Protocol security': lambda: execute_with_retry(
-            lambda: calculate_score.protocol_score(url=url), 
+            lambda: calculate_score.protocol_score(url=url, hostname=check_hostname), 
             max_retries=retry_count, 
             module_name='Protocol security'
         ),
@@ -228,12 +234,12 @@ def get_results(url: str, timeout: int = 30, retry_count: int = 3, screenshot_en
             module_name='HTML content and behavior'
         ),
         'Reputation Databases': lambda: execute_with_retry(
-            lambda: calculate_score.reputationDB_score(url=url), 
+            lambda: calculate_score.reputationDB_score(url=url, hostname=check_hostname), 
             max_retries=retry_count, 
             module_name='Reputation Databases'
         ),
         'Domain pattern': lambda: execute_with_retry(
-            lambda: calculate_score.domain_pattern_score(url=url), 
+            lambda: calculate_score.domain_pattern_score(url=url, hostname=check_hostname), 
             max_retries=retry_count, 
             module_name='Domain pattern'
         ),
@@ -248,12 +254,12 @@ def get_results(url: str, timeout: int = 30, retry_count: int = 3, screenshot_en
             module_name='Server reliability'
         ),
         'Domain age': lambda: execute_with_retry(
-            lambda: calculate_score.domain_age_score(website_info=web_info), 
+            lambda: calculate_score.domain_age_score(website_info=web_info, today_ordinal=today_ordinal), 
             max_retries=retry_count, 
             module_name='Domain age'
         ),
         'User review': lambda: execute_with_retry(
-            lambda: calculate_score.review_score(list_of_review=review.CURRENT_REVIEW), 
+            lambda: calculate_score.review_score(list_of_review=list_of_review), 
             max_retries=retry_count, 
             module_name='User review'
         )
@@ -319,13 +325,13 @@ def calculate_final_verdict(results):
     NEW: Modules with errors are excluded from weight calculation
     and marked with has_error flag for UI highlighting.
     """
-    weighted_sum = 0.0
-    total_weight_used = 0.0
+    # NaN = module bị loại (error / no data), theo thứ tự SCORE_KEYS
+    scores_vec = np.full(len(SCORE_KEYS), np.nan)
     component_scores = {}
     all_details = {}
     error_modules = {}  # Track which modules had errors
 
-    for criterion, weight in SCORE_WEIGHTS.items():
+    for i, criterion in enumerate(SCORE_KEYS):
         data = results[criterion]
         sub_score = data.get('score', 0.0)  # 0.0-1.0
         details = data.get('details', [])
@@ -351,8 +357,7 @@ def calculate_final_verdict(results):
             error_modules[criterion] = 'no-data' if has_no_data else True
         else:
             # Normal module - include in weighted sum
-            weighted_sum += sub_score * weight
-            total_weight_used += weight
+            scores_vec[i] = sub_score
             component_scores[criterion] = round(sub_score * 10, 1)
             error_modules[criterion] = False
         
@@ -363,8 +368,10 @@ def calculate_final_verdict(results):
             all_details[criterion] = ["<b>Status:</b> No data available"]
 
     # Calculate average (0.0-1.0) using only non-error modules
+    mask = ~np.isnan(scores_vec)
+    total_weight_used = float(SCORE_WEIGHTS_VEC[mask].sum())
     if total_weight_used > 0:
-        avg_score = weighted_sum / total_weight_used
+        avg_score = float(np.dot(scores_vec[mask], SCORE_WEIGHTS_VEC[mask])) / total_weight_used
     else:
         avg_score = 0.0
 
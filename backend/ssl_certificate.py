@@ -171,6 +171,7 @@ def check_ssl_certificate(hostname: str, timeout: int = 5) -> Dict[str, Any]:
         except:
             report["details"] = ["<b>ERROR:</b> Connection timed out - website is unreachable."]
             report["sub_score"] = 0.0
+            report["transient"] = True  # Lỗi mạng, không phải kết luận về chứng chỉ
 
     except ConnectionRefusedError:
         # Port 443 refused - likely HTTP-only site
@@ -182,6 +183,7 @@ def check_ssl_certificate(hostname: str, timeout: int = 5) -> Dict[str, Any]:
         except:
             report["details"] = ["<b>ERROR:</b> Connection refused - website is unreachable."]
             report["sub_score"] = 0.0
+            report["transient"] = True
 
     except Exception as e:
         # No HTTPS/SSL available - check if HTTP works
@@ -193,6 +195,7 @@ def check_ssl_certificate(hostname: str, timeout: int = 5) -> Dict[str, Any]:
         except:
             report["details"] = [f"<b>ERROR:</b> No SSL certificate available: {str(e)}"]
             report["sub_score"] = 0.0
+            report["transient"] = True
 
     return report
 
@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 import os
 import sys
 from pathlib import Path
@@ -10,10 +11,12 @@ from PyQt6.QtWidgets import QGraphicsDropShadowEffect, QFrame
 BASE_DIR = Path(__file__).resolve().parent
 MEDIA_DIR = BASE_DIR / "media"
 
+@lru_cache(maxsize=None)
 def get_asset_path(filename):
     """
     Trả về đường dẫn tuyệt đối của file trong folder media.
     Hỗ trợ cả khi chạy code thường và khi đóng gói thành file .exe (PyInstaller)
+    Kết quả được cache theo tên file nên chỉ stat ổ đĩa một lần cho mỗi asset.
     """
     if hasattr(sys, '_MEIPASS'):
         # PyInstaller extracts to _MEIPASS/frontend/media/
@@ -1,9 +1,12 @@
 # frontend/main_window.py
 from PyQt6.QtWidgets import QMainWindow, QStackedWidget, QWidget, QVBoxLayout, QLabel, QHBoxLayout
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from . import configuration as cf
 
 class MainWindow(QMainWindow):
+    # Phát ra widget của trang hiện tại mỗi khi đổi trang
+    currentWidgetChanged = pyqtSignal(QWidget)
+
     def __init__(self):
         super().__init__()
         
@@ -21,6 +24,7 @@ class MainWindow(QMainWindow):
 
         # 4. StackedWidget (Nơi chứa các trang Home, Login, Result...)
         self.pages_stack = QStackedWidget()
+        self.pages_stack.currentChanged.connect(self._on_current_changed)
         self.main_layout.addWidget(self.pages_stack)
         
         # Style
@@ -42,6 +46,11 @@ class MainWindow(QMainWindow):
 
         self.main_layout.addWidget(self.header)
 
+    def _on_current_changed(self, index):
+        widget = self.pages_stack.widget(index)
+        if widget is not None:
+            self.currentWidgetChanged.emit(widget)
+
     def set_page(self, widget):
         """Hàm tiện ích để chuyển trang"""
         self.pages_stack.setCurrentWidget(widget)
@@ -13,7 +13,7 @@ from PyQt6.QtGui import QFont, QPainter, QPen, QPixmap, QColor, QDesktopServices
 from PyQt6.QtWidgets import QGraphicsOpacityEffect
 
 from backend import scoring_system
-from backend.config import SCORE_WEIGHTS
+from backend.config import SCORE_WEIGHTS, SCORE_WEIGHTS_SUM
 from .user_review import ReviewsSection
 from .loading_page import LoadingPage
 from .result_components import AnalysisWorker, ImagePopup, ScoreGauge  # Import unified components
@@ -631,7 +631,7 @@ class SearchResultsPage(QWidget):
         self.criteria_bars = []
         
         # Calculate total weight for percentage
-        total_weight = sum(SCORE_WEIGHTS.values())
+        total_weight = SCORE_WEIGHTS_SUM
         
         # Sort criteria by percentage (weight) descending
         criteria_with_percentage = [(name, (SCORE_WEIGHTS.get(name, 0.0) / total_weight) * 100) for name in criteria_names]
@@ -771,7 +771,7 @@ class SearchResultsPage(QWidget):
         
         # Load reviews from Firebase for this URL before displaying
         from backend import review
-        review.get_reviews(self.query_url)
+        self.reviews_section.reviews_data = review.get_reviews(self.query_url)
         self.reviews_section.display_reviews()
         # Footer
         btn_back_text = "Close" if self.is_extension_mode else "Back to Home Page"
@@ -872,7 +872,7 @@ class SearchResultsPage(QWidget):
             try:
                 btn_name, p_bar = widgets
                 weight = SCORE_WEIGHTS.get(name, 0.0)
-                total_weight = sum(SCORE_WEIGHTS.values())
+                total_weight = SCORE_WEIGHTS_SUM
                 percentage = (weight / total_weight) * 100 if total_weight > 0 else 0
 
                 err_status = self.error_modules.get(name, False)
@@ -962,7 +962,7 @@ class SearchResultsPage(QWidget):
         scan_results = self.descriptions.get(criteria_name, [])
         score_val = self.criteria.get(criteria_name, 0.0)
         weight = SCORE_WEIGHTS.get(criteria_name, 0.0)
-        total_weight = sum(SCORE_WEIGHTS.values())
+        total_weight = SCORE_WEIGHTS_SUM
         percentage = (weight / total_weight) * 100
         
         # Create custom dialog
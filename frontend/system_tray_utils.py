@@ -9,7 +9,7 @@ class SystemTrayManager(QObject):
     """
     Module quản lý việc chạy ngầm dưới khay hệ thống.
     """
-    def __init__(self, main_window, app, icon_path=None, app_id="my.app.id"):
+    def __init__(self, main_window, app, icon_path=None, app_id="my.app.id", icon=None):
         super().__init__()
         self.window = main_window
         self.app = app
@@ -27,8 +27,10 @@ class SystemTrayManager(QObject):
         # 3. Khởi tạo Tray Icon
         self.tray_icon = QSystemTrayIcon(self.window)
         
-        # Xử lý icon: Nếu có path thì dùng, không thì dùng icon của window
-        if self.icon_path and os.path.exists(self.icon_path):
+        # Xử lý icon: Ưu tiên QIcon đã tạo sẵn, rồi tới path, cuối cùng là icon của window
+        if icon is not None and not icon.isNull():
+            self.icon = icon
+        elif self.icon_path and os.path.exists(self.icon_path):
             self.icon = QIcon(self.icon_path)
         else:
             self.icon = self.window.windowIcon()
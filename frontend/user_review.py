@@ -338,7 +338,7 @@ class ReviewsSection(QWidget):
 
     def __init__(self, grid_columns=3, load_increment=None, parent=None):
         super().__init__(parent)
-        self.reviews_data = review.CURRENT_REVIEW
+        self.reviews_data = []
         self.displayed_reviews_count = 3
 
         self.grid_columns = grid_columns
@@ -483,8 +483,7 @@ class ReviewsSection(QWidget):
         
         # After successful save, review_data will have reviewId from save_review
         # Reload reviews to get updated data with IDs
-        review.get_reviews(url)
-        self.reviews_data = review.CURRENT_REVIEW
+        self.reviews_data = review.get_reviews(url)
         self.is_collapsing_mode = False
 
         if self.displayed_reviews_count < self.reviews_per_load:
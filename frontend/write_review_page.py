@@ -109,7 +109,7 @@ class WriteReviewPage(QWidget):
                     # Hợp lệ -> Gửi signal và reset
                     comment = self.input_comment.toPlainText().strip()
                     self.review_submitted.emit(score, comment)
-                    self._reset_form()
+                    self.reset_form()
                 else: self._show_error("Invalid Score", "Score must be between 0.0 and 10.0")
             except ValueError: self._show_error("Invalid Input", "Please enter a valid number for score.")
 
@@ -122,10 +122,11 @@ class WriteReviewPage(QWidget):
         msg.exec()
         
     def _on_cancel(self):
-        self._reset_form()
+        self.reset_form()
         self.cancelled.emit()
 
-    def _reset_form(self):
+    def reset_form(self):
+        """Xóa nội dung form để dùng lại trang cho lần review tiếp theo"""
         self.input_score.clear()
         self.input_comment.clear()
         self._check_input_validity()